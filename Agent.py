@@ -1,7 +1,38 @@
 from Board import *
 from Pacman import *
 
+import threading
 import time
+import numpy
+from dataclasses import dataclass
+
+@dataclass
+class TurnBudget:
+	"""
+	How an agent used its time on one turn.
+
+	* `thinkTime` (float): the seconds from the start of the turn until `findMove` returned
+	* `timeLimit` (float): the agent's time limit
+	* `movesSet` (int): the number of calls to `setMove` before the deadline
+	* `lateMoves` (int): the number of calls to `setMove` after the deadline, which were ignored
+	* `fellBack` (bool): True if no move was set in time, so the move from the previous turn was used
+		(or, for a `ProcessAgent` whose worker has stopped, a fallback move)
+	"""
+
+	turn: int
+	thinkTime: float
+	timeLimit: float
+	movesSet: int
+	lateMoves: int
+	fellBack: bool
+
+	def utilisation(self) -> float:
+		"""Return the fraction of the time limit that was used."""
+		return self.thinkTime / self.timeLimit if self.timeLimit > 0 else float('inf')
+
+	def missedDeadline(self) -> bool:
+		"""Return True if `findMove` returned after the time limit."""
+		return self.thinkTime > self.timeLimit
 
 class BaseAgent:
 	"""
@@ -20,10 +51,22 @@ class BaseAgent:
 	* `ghostCaught`
 	* `ghostNotCaught`
 	* `ghostsHaveMoved`
-	* `ghostPositionDistribution`
+	* `ghostPositionDistribution` (or `ghostPositionArray`)
 	* `ghostTypeDistribution`
 	
+	The methods that report a single prediction (`mostLikelyGhostPosition`, `ghostPositionProbability`,
+	`mostLikelyGhostType` and `ghostTypeProbability`) can also be overloaded if the agent can answer
+	them without building a whole distribution.
+	
 	Also the constructor for the child class must call BaseAgent's constructor.
+	
+	Agents that keep improving their move until time runs out can use `anytimeSearch`
+	to manage the time limit for them.
+	
+	Agents can also keep working between turns (while the game moves the ghosts, prints and
+	draws) by overloading `think` and calling `enableBackgroundThinking` in their constructor.
+	
+	The time each turn took, and whether moves were set too late, is recorded in `budgetReport`.
 	"""
 	
 	def __init__(self, board: Board, pacman: Pacman, numGhosts: int, timeLimit: float):
@@ -34,13 +77,156 @@ class BaseAgent:
 		self._timeLimit = timeLimit
 		self._startTime = 0
 		self._move = None
+		self._thinkThread = None
+		self._budget = []
+		self._movesSet = 0
+		self._lateMoves = 0
+
+	def startTurn(self) -> None:
+		"""Start the clock for a new turn.  This is called by the game just before `findMove`."""
+		self._startTime = time.perf_counter()
+		self._movesSet = 0
+		self._lateMoves = 0
+
+	def endTurn(self) -> None:
+		"""Record how the turn's time was used.  This is called by the game just after `findMove`."""
+		thinkTime = time.perf_counter() - self._startTime
+		self._budget.append(TurnBudget(len(self._budget) + 1, thinkTime, self._timeLimit, self._movesSet, self._lateMoves, self._movesSet == 0))
+
+	def budgetReport(self) -> list[TurnBudget]:
+		"""Return how the time was used on each turn so far."""
+		return self._budget
+
+	def enableBackgroundThinking(self) -> None:
+		"""
+		Start a worker thread that calls `think` between turns.
+		
+		The game pauses the thread before calling any of the agent's other methods and resumes it
+		once the agent has been told about the ghosts' moves.  While paused, no call to `think` is
+		in progress, so results stored by `think` can be used safely in the next `findMove`.
+		"""
+		
+		if self._thinkThread is None:
+			self._thinkLock = threading.Lock()
+			self._thinkAllowed = threading.Event()
+			self._thinkStopped = False
+			self._thinkThread = threading.Thread(target=self._thinkLoop, daemon=True)
+			self._thinkThread.start()
+			
+	def _thinkLoop(self) -> None:
+		"""Repeatedly call `think` whenever background thinking is allowed."""
+		
+		while True:
+			self._thinkAllowed.wait()
+			with self._thinkLock:
+				if self._thinkStopped:
+					return
+				if self._thinkAllowed.is_set() and not self.think():
+					self._thinkAllowed.clear()
+					
+	def pauseThinking(self) -> None:
+		"""Pause background thinking, waiting for the current call to `think` to finish."""
+		
+		if self._thinkThread is not None:
+			with self._thinkLock:
+				self._thinkAllowed.clear()
+				
+	def resumeThinking(self) -> None:
+		"""Allow background thinking to continue."""
+		
+		if self._thinkThread is not None:
+			with self._thinkLock:
+				self._thinkAllowed.set()
+				
+	def stopThinking(self) -> None:
+		"""Stop the background thinking thread at the end of the game."""
+		
+		if self._thinkThread is not None:
+			with self._thinkLock:
+				self._thinkStopped = True
+				self._thinkAllowed.set()
+			self._thinkThread.join()
+			self._thinkThread = None
+
+	def think(self) -> bool:
+		"""
+		Do a small amount of work in the background between turns.
+		
+		This is only called if `enableBackgroundThinking` has been called.  Each call should be
+		short (a few milliseconds) since the game waits for the current call to finish before
+		starting the agent's turn.
+		
+		** Return **
+		
+		True if there is more work to do, False to wait until the next turn.
+		"""
+		return False
 
 	def timeRemaining(self) -> bool:
 		"""Check if time remains before the turn expires."""
 		
-		if time.time() < self._startTime + self._timeLimit:
+		if time.perf_counter() < self._startTime + self._timeLimit:
 			return True
 		return False
+		
+	def timeLeft(self) -> float:
+		"""Return the number of seconds left before the turn expires (negative once it has)."""
+		return self._startTime + self._timeLimit - time.perf_counter()
+		
+	def anytimeSearch(self, improve, checkInterval: int = 64, safetyMargin: float = .02) -> int:
+		"""
+		Repeatedly improve the move until the turn is about to expire.
+		
+		** Parameters **
+		
+		*`improve`: a function taking the iteration number (starting at 0) that does one step of the
+		agent's search and returns the best move found so far (or None if there is none yet).  It
+		can raise `StopIteration` to end the search early, for example when the search is complete.
+		*`checkInterval` (int): the maximum number of iterations between checks of the clock.
+		*`safetyMargin` (float): the fraction of the time limit to leave unused at the end of the turn.
+		
+		** Return **
+		
+		The number of iterations that were run.
+		
+		Whenever the best move changes it is committed with `setMove`, so the move used by the game
+		is always the best one found before the deadline.  The clock is only read every few iterations;
+		the number of iterations between checks adapts to how long each iteration takes so that the
+		search does not overrun the deadline.
+		"""
+		
+		clock = time.perf_counter
+		deadline = self._startTime + self._timeLimit * (1 - safetyMargin)
+		searchStart = clock()
+		best = None
+		iteration = 0
+		interval = 1
+		try:
+			while True:
+				for repeat in range(interval):
+					move = improve(iteration)
+					iteration += 1
+					if move is not None and move != best:
+						best = move
+						self.setMove(move)
+						
+				now = clock()
+				if now >= deadline:
+					break
+					
+				# Stop if another iteration would not finish in time, otherwise
+				# check again after about half the remaining time
+				perIteration = (now - searchStart) / iteration
+				if now + perIteration >= deadline:
+					break
+				elif perIteration > 0:
+					interval = max(1, min(checkInterval, int((deadline - now) / (2 * perIteration))))
+				else:
+					interval = checkInterval
+		except StopIteration:
+			pass
+			
+		return iteration
 
 	def setMove(self, move: str) -> None:
 		"""
@@ -53,6 +239,9 @@ class BaseAgent:
 		
 		if self.timeRemaining():
 			self._move = move
+			self._movesSet += 1
+		else:
+			self._lateMoves += 1
 
 	def getMove(self) -> str | None:
 		"""Return the move that has been set (if any)"""
@@ -115,8 +304,31 @@ class BaseAgent:
 		A dictionary mapping board locations to the probability that the ghost is in that location.
 		
 		The sum of the dictionary values must add to 1 and each value cannot be negative.
+		
+		Agents that implement `ghostPositionArray` instead get this method for free.
 		"""
-		pass
+		if self.overrides('ghostPositionArray'):
+			return dict(zip(self._board.validLocations(), self.ghostPositionArray(ghostId).tolist()))
+		
+	def ghostPositionArray(self, ghostId: int) -> numpy.ndarray:
+		"""
+		Return the probability of a ghost being in each possible position on the map as an array.
+		
+		** Parameter **
+		
+		*`ghostId` (int): a integer (0 to number of ghosts - 1) indicating which ghost has been caught.
+		
+		** Return **
+		
+		An array with the probability of the ghost being in each valid location, indexed by the board's
+		cell ids (see `Board.cellId`).
+		
+		The game's displays and `Replay` use this rather than `ghostPositionDistribution`, since it avoids
+		building a dictionary over the whole board.  By default it is built from `ghostPositionDistribution`;
+		agents that keep their beliefs in arrays should overload it.
+		"""
+		distribution = self.ghostPositionDistribution(ghostId)
+		return numpy.fromiter((distribution.get(location, 0.) for location in self._board.validLocations()), float, self._board.numCells())
 		
 	def ghostTypeDistribution(self, ghostId) -> dict[str, float]:
 		"""
@@ -134,3 +346,77 @@ class BaseAgent:
 		The sum of the dictionary values must add to 1 and each value cannot be negative.
 		"""
 		pass
+		
+	def overrides(self, method: str) -> bool:
+		"""Return whether the agent's class overloads a method of `BaseAgent`."""
+		return getattr(type(self), method) is not getattr(BaseAgent, method)
+		
+	def mostLikelyGhostPosition(self, ghostId: int) -> tuple[Coordinate, float]:
+		"""
+		Return the most likely location of a ghost and the probability of it being there.
+		
+		This is used to report the agent's predictions.  By default it is found from `ghostPositionArray` (if
+		it is overloaded) or `ghostPositionDistribution`; agents that can answer more quickly (for example from
+		cached state) can overload it.
+		"""
+		if self.overrides('ghostPositionArray'):
+			probabilities = self.ghostPositionArray(ghostId)
+			cellId = int(numpy.argmax(probabilities))
+			return (self._board.validLocations()[cellId], float(probabilities[cellId]))
+		distribution = self.ghostPositionDistribution(ghostId)
+		location = max(distribution, key=distribution.get)
+		return (location, distribution[location])
+		
+	def ghostPositionProbability(self, ghostId: int, location: Coordinate) -> float:
+		"""Return the probability of a ghost being at a location.  By default it is found from `ghostPositionArray` or `ghostPositionDistribution`."""
+		if self.overrides('ghostPositionArray'):
+			return float(self.ghostPositionArray(ghostId)[self._board.cellId(location)])
+		return self.ghostPositionDistribution(ghostId).get(location, 0.)
+		
+	def mostLikelyGhostType(self, ghostId: int) -> tuple[str, float]:
+		"""Return the most likely type of a ghost and its probability.  By default it is found from `ghostTypeDistribution`."""
+		distribution = self.ghostTypeDistribution(ghostId)
+		ghostType = max(distribution, key=distribution.get)
+		return (ghostType, distribution[ghostType])
+		
+	def ghostTypeProbability(self, ghostId: int, ghostType: str) -> float:
+		"""Return the probability of a ghost having a type.  By default it is found from `ghostTypeDistribution`."""
+		return self.ghostTypeDistribution(ghostId).get(ghostType, 0.)
+
+def summarizeBudget(turns: list[TurnBudget]) -> dict:
+	"""
+	Summarize how an agent used its time over a number of turns.
+
+	** Return value **
+
+	A dictionary with the number of `turns`, the `meanUtilisation`, `p95Utilisation` and `maxUtilisation`
+	of the time limit, the `maxThinkTime` in seconds, the number of `deadlineMisses` (turns where
+	`findMove` overran), `lateMoves` (ignored calls to `setMove`) and `fallbacks` (turns where no move
+	was set in time).
+	"""
+
+	if not turns:
+		return { 'turns': 0, 'meanUtilisation': None, 'p95Utilisation': None, 'maxUtilisation': None, 'maxThinkTime': None,
+			'deadlineMisses': 0, 'lateMoves': 0, 'fallbacks': 0 }
+	utilisation = numpy.array([ turn.utilisation() for turn in turns ])
+	return {
+		'turns': len(turns),
+		'meanUtilisation': float(utilisation.mean()),
+		'p95Utilisation': float(numpy.percentile(utilisation, 95)),
+		'maxUtilisation': float(utilisation.max()),
+		'maxThinkTime': max(turn.thinkTime for turn in turns),
+		'deadlineMisses': sum(1 for turn in turns if turn.missedDeadline()),
+		'lateMoves': sum(turn.lateMoves for turn in turns),
+		'fallbacks': sum(1 for turn in turns if turn.fellBack),
+	}
+
+def printBudgetSummary(summary: dict) -> None:
+	"""Print a summary from `summarizeBudget`."""
+
+	if not summary['turns']:
+		print('No turns played')
+		return
+	print(f'Time used: mean {summary["meanUtilisation"]*100:.1f}%, 95th percentile {summary["p95Utilisation"]*100:.1f}%, '
+		f'max {summary["maxUtilisation"]*100:.1f}% ({summary["maxThinkTime"]*1000:.1f} ms) of the time limit')
+	print(f'Deadlines missed: {summary["deadlineMisses"]} of {summary["turns"]} turns, '
+		f'{summary["lateMoves"]} late moves ignored, {summary["fallbacks"]} turns fell back to the previous move')
@@ -0,0 +1,235 @@
+"""
+Host a Pacman agent in a separate process.
+
+The game talks to a `ProcessAgent`, which behaves like any other agent but forwards every call
+over a pipe to the real agent running in a worker process.  Each call to `findMove` has a hard
+wall-clock deadline: if the worker has not finished by the end of the time limit (plus a small
+grace period) it is terminated and the rest of the game is played by a simple fallback policy.
+A slow or stuck agent therefore can never hold up the game.
+
+Moves are streamed back as soon as the agent calls `setMove`, so the best move the agent set
+before the deadline is used even if its `findMove` overruns.
+"""
+
+from Agent import *
+import ParticleFilter
+
+import multiprocessing
+import pickle
+import random
+import time
+
+def _send(conn, message) -> None:
+	"""Send a message over the pipe."""
+	conn.send_bytes(pickle.dumps(message, pickle.HIGHEST_PROTOCOL))
+
+def _receive(conn):
+	"""Receive a message from the pipe."""
+	return pickle.loads(conn.recv_bytes())
+
+def seedAgentRandomness(seed: int | None) -> None:
+	"""
+	Seed the random number generators that agents use: the `random` module and the default
+	generator of the particle filters.  If `seed` is None they are seeded from fresh entropy.
+	"""
+	random.seed(seed)
+	ParticleFilter.seed(seed)
+
+def _hostAgent(conn, agentClass, board: Board, numGhosts: int, timeLimit: float, seed: int | None = None) -> None:
+	"""
+	Run an agent in the worker process, answering requests from the game until told to stop.
+
+	** Requests **
+
+	* `('findMove', turn, x, y, observations)`: replies with `('started', turn)` when the agent starts
+		`findMove`, `('move', turn, move)` each time the agent sets a move and `('done', turn)` when
+		`findMove` returns.
+	* `('caught', ghostId, x, y)`, `('notCaught', ghostId, x, y)`, `('moved', x, y)` and `('resume',)`:
+		no reply.
+	* `('position', ghostId)` and `('type', ghostId)`: replies with the distribution.
+	* `('stop',)`: ends the worker.
+
+	`x` and `y` are Pacman's current location.  The agent's random number generators are seeded with
+	`seed` (or, if it is None, from fresh entropy rather than the state copied from the parent process)
+	before the agent is created.
+	"""
+
+	seedAgentRandomness(seed)
+	pacman = Pacman(board)
+	agent = agentClass(board, pacman, numGhosts, timeLimit)
+
+	turn = 0
+	agentSetMove = agent.setMove
+	def streamingSetMove(move: str) -> None:
+		agentSetMove(move)
+		if agent.getMove() == move:
+			_send(conn, ('move', turn, move))
+	agent.setMove = streamingSetMove
+
+	while True:
+		message = _receive(conn)
+		agent.pauseThinking()
+		match message[0]:
+			case 'findMove':
+				(turn, x, y, observations) = message[1:]
+				pacman.getState().location = Coordinate(x, y)
+				_send(conn, ('started', turn))
+				agent.startTurn()
+				agent.findMove(observations)
+				_send(conn, ('done', turn))
+			case 'caught':
+				pacman.getState().location = Coordinate(message[2], message[3])
+				agent.ghostCaught(message[1])
+			case 'notCaught':
+				pacman.getState().location = Coordinate(message[2], message[3])
+				agent.ghostNotCaught(message[1])
+			case 'moved':
+				pacman.getState().location = Coordinate(message[1], message[2])
+				agent.ghostsHaveMoved()
+			case 'position':
+				_send(conn, ('position', agent.ghostPositionArray(message[1])))
+			case 'type':
+				_send(conn, ('type', agent.ghostTypeDistribution(message[1])))
+			case 'resume':
+				agent.resumeThinking()
+			case 'stop':
+				agent.stopThinking()
+				return
+
+class ProcessAgent(BaseAgent):
+	"""
+	Agent that runs another agent class in a worker process with a hard deadline.
+
+	** Member data **
+
+	*`_grace` (float): extra time (in seconds) allowed for messages to travel to and from the worker
+	*`_process`: the worker process, or None once it has been stopped
+	*`_failures` (list[str]): descriptions of why the worker was stopped early (if it was)
+
+	If the worker misses a deadline it is terminated.  From then on Pacman keeps going in the same
+	direction when possible (and otherwise picks a random direction) and the predicted distributions
+	are uniform.
+	"""
+
+	def __init__(self, agentClass, board: Board, pacman: Pacman, numGhosts: int, timeLimit: float, grace: float = .05, seed: int | None = None):
+		"""Start a worker process running a new instance of `agentClass`, seeding its random numbers with `seed` if given."""
+		BaseAgent.__init__(self, board, pacman, numGhosts, timeLimit)
+		self._grace = grace
+		self._turn = 0
+		self._failures = []
+
+		self._conn, workerConn = multiprocessing.Pipe()
+		self._process = multiprocessing.Process(target=_hostAgent, args=(workerConn, agentClass, board, numGhosts, timeLimit, seed), daemon=True)
+		self._process.start()
+		workerConn.close()
+
+	def _notify(self, *message) -> None:
+		"""Send a request that has no reply."""
+		if self._process is not None:
+			try:
+				_send(self._conn, message)
+			except (BrokenPipeError, ConnectionResetError, EOFError):
+				self._terminate('worker stopped unexpectedly')
+
+	def _terminate(self, reason: str) -> None:
+		"""Stop the worker process after it has failed."""
+		if self._process is not None:
+			self._failures.append(f'Turn {self._turn}: {reason}')
+			self._process.terminate()
+			self._process.join()
+			self._process = None
+			self._conn.close()
+
+	def _waitFor(self, kind: str, deadline: float):
+		"""
+		Wait until the deadline for a reply of the given kind, handling streamed moves as they arrive.
+
+		Returns the reply, or None if the worker failed to reply in time.
+		"""
+
+		try:
+			while self._process is not None:
+				if not self._conn.poll(max(0., deadline - time.perf_counter())):
+					request = { 'started': 'updating beliefs before findMove', 'done': 'findMove', 'position': 'ghostPositionArray', 'type': 'ghostTypeDistribution' }[kind]
+					self._terminate(f'{request} did not finish in time')
+					return None
+				reply = _receive(self._conn)
+				if reply[0] == 'move':
+					if reply[1] == self._turn:
+						self.setMove(reply[2])
+				elif reply[0] == kind and (kind not in ('started', 'done') or reply[1] == self._turn):
+					return reply
+		except (EOFError, ConnectionResetError):
+			self._terminate('worker stopped unexpectedly')
+		return None
+
+	def failures(self) -> list[str]:
+		"""Return the reasons that the worker process was stopped early (if it was)."""
+		return self._failures
+
+	def findMove(self, observations: list[int]) -> None:
+		"""
+		Ask the worker for a move, waiting no longer than the time limit plus the grace period.
+
+		The worker may still be handling the earlier notifications (such as `ghostsHaveMoved`), which
+		are not limited when the agent runs in the game's process, so the time limit starts when the
+		worker starts `findMove`.  The worker gets a time limit (plus the grace period) to finish those
+		notifications.
+		"""
+
+		self._turn += 1
+		location = self._pacman.getState().location
+		self._notify('findMove', self._turn, location.x, location.y, observations)
+		if self._waitFor('started', self._startTime + self._timeLimit + self._grace) is not None:
+			# Restart the clock so that the moves streamed back are judged against the worker's time limit
+			self._startTime = time.perf_counter()
+			self._waitFor('done', self._startTime + self._timeLimit + self._grace)
+
+		possibleMoves = self._pacman.possibleMoves()
+		if self._move not in possibleMoves:
+			self._move = random.choice(list(possibleMoves))
+
+	def ghostCaught(self, ghostId: int) -> None:
+		location = self._pacman.getState().location
+		self._notify('caught', ghostId, location.x, location.y)
+
+	def ghostNotCaught(self, ghostId: int) -> None:
+		location = self._pacman.getState().location
+		self._notify('notCaught', ghostId, location.x, location.y)
+
+	def ghostsHaveMoved(self) -> None:
+		location = self._pacman.getState().location
+		self._notify('moved', location.x, location.y)
+
+	def ghostPositionArray(self, ghostId: int) -> numpy.ndarray:
+		self._notify('position', ghostId)
+		reply = self._waitFor('position', time.perf_counter() + self._timeLimit + self._grace)
+		if reply is None:
+			return numpy.full(self._board.numCells(), 1/self._board.numCells())
+		return reply[1]
+
+	def ghostTypeDistribution(self, ghostId: int) -> dict[str, float]:
+		self._notify('type', ghostId)
+		reply = self._waitFor('type', time.perf_counter() + self._timeLimit + self._grace)
+		if reply is None:
+			return { ghostType : .2 for ghostType in 'RSCBO' }
+		return reply[1]
+
+	def pauseThinking(self) -> None:
+		"""The worker pauses its agent's background thinking whenever it receives a request."""
+		pass
+
+	def resumeThinking(self) -> None:
+		self._notify('resume')
+
+	def stopThinking(self) -> None:
+		"""The game is over, so shut down the worker process."""
+
+		if self._process is not None:
+			self._notify('stop')
+			self._process.join(self._timeLimit + self._grace)
+			if self._process.is_alive():
+				self._process.terminate()
+				self._process.join()
+			self._process = None
+			self._conn.close()
@@ -0,0 +1,288 @@
+"""
+Micro-benchmarks for the parts of Ghostbusters that agents and games spend their time in.
+
+Each benchmark case times an operation several times (the samples).  Fast operations are repeated
+enough times in each sample to be measured reliably, and every sample starts from a freshly set up
+state, so operations that change their state (such as `ParticleFilter.reweight`) are measured the
+same way in every sample.  The results are the seconds per operation.
+
+The cases cover:
+
+* `Board`: construction, `possibleMoves`, `pathDistance` and `noisyDistance`
+* `Ghost`: `possibleGhostMoves` for each type of ghost
+* `ParticleFilter`: `advance`, `reweight` and `resample` for `ParticleFilter` and
+	`RaoBlackwellisedParticleFilter` at several numbers of particles
+* `Game`: complete seeded games without output for each agent.  Agents that search until the time
+	limit take about the same time whatever their speed, so these mostly measure the other agents.
+
+Every random number used by the cases is seeded so that runs are comparable.  Every case takes at
+least 5 samples, the fewest for which BenchmarkHistory.py can find a significant change at its
+default level of 0.01.  The results (including every sample) are printed and can be written as
+JSON with `-o`:
+
+	python Benchmark.py -o results.json
+	python Benchmark.py -k ParticleFilter --quick
+"""
+
+from Engine import *
+from ParticleFilter import ParticleFilter, RaoBlackwellisedParticleFilter
+
+import argparse, datetime, importlib, json, math, platform, re, statistics, subprocess, sys, time
+from dataclasses import dataclass
+
+@dataclass
+class BenchmarkCase:
+	"""
+	An operation to time.
+
+	* `setup`: a function, called before each sample without being timed, that returns the function to
+		time.  The returned function does `calls` operations, or returns the number of operations it did.
+	* `samples` (int): the number of samples to take
+	"""
+
+	name: str
+	group: str
+	setup: object
+	calls: int = 1
+	samples: int = 15
+
+def _timeSample(run, number: int) -> tuple[float, int]:
+	"""Call `run` `number` times and return the seconds taken and the number of operations done."""
+
+	operations = 0
+	start = time.perf_counter()
+	for repeat in range(number):
+		result = run()
+		operations += result if isinstance(result, int) else 0
+	return (time.perf_counter() - start, operations)
+
+def measure(case: BenchmarkCase, sampleTime: float = .02, samples: int | None = None) -> dict:
+	"""
+	Time a benchmark case.
+
+	** Parameters **
+
+	* `sampleTime` (float): the minimum seconds for each sample; the operation is repeated until it takes this long
+	* `samples` (int): the number of samples, or None to use the case's number
+
+	** Return value **
+
+	A dictionary with the case's `name` and `group`, the `number` of repeats in each sample, the seconds
+	per operation of every sample (`samples`) and their `min`, `median`, `mean` and `stdev`.
+	"""
+
+	# Find how many repeats make a sample last long enough
+	number = 1
+	while True:
+		(elapsed, operations) = _timeSample(case.setup(), number)
+		if elapsed >= sampleTime or number >= 1 << 20:
+			break
+		number *= 2 if elapsed <= 0 else max(2, min(10, math.ceil(sampleTime / elapsed)))
+
+	times = []
+	for sample in range(samples or case.samples):
+		(elapsed, operations) = _timeSample(case.setup(), number)
+		times.append(elapsed / (operations or number * case.calls))
+
+	return {
+		'name': case.name,
+		'group': case.group,
+		'number': number,
+		'samples': times,
+		'min': min(times),
+		'median': statistics.median(times),
+		'mean': statistics.fmean(times),
+		'stdev': statistics.stdev(times) if len(times) > 1 else 0.,
+	}
+
+def boardCases() -> list[BenchmarkCase]:
+	"""Return the cases for `Board`."""
+
+	board = Board()
+	locations = board.validLocations()
+	rng = random.Random(0)
+	pairs = [ (rng.choice(locations), rng.choice(locations)) for i in range(1000) ]
+
+	def possibleMoves():
+		for location in locations:
+			board.possibleMoves(location)
+
+	def pathDistance():
+		for (location1, location2) in pairs:
+			board.pathDistance(location1, location2)
+
+	def noisyDistance():
+		sensorRng = random.Random(0)
+		def run():
+			for (location1, location2) in pairs:
+				board.noisyDistance(location1, location2, sensorRng)
+		return run
+
+	return [
+		BenchmarkCase('Board()', 'Board', lambda: Board, samples=5),
+		BenchmarkCase('Board.possibleMoves', 'Board', lambda: possibleMoves, calls=len(locations)),
+		BenchmarkCase('Board.pathDistance', 'Board', lambda: pathDistance, calls=len(pairs)),
+		BenchmarkCase('Board.noisyDistance', 'Board', noisyDistance, calls=len(pairs)),
+	]
+
+def ghostStates(board: Board, ghostType: str, count: int, seed: int = 0) -> list[tuple[GhostState, Coordinate]]:
+	"""Return (ghost state, Pacman location) pairs seen while a ghost of a type wanders the board for `count` turns."""
+
+	rng = random.Random(seed)
+	locations = board.validLocations()
+	ghost = randomGhost(board, rng)
+	ghost = GhostState(alive=True, ghostType=ghostType, location=ghost.location, heading=ghost.heading, thinking=ghost.thinking)
+	states = []
+	pacmanLocation = board.getPacmanStart()
+	for turn in range(count):
+		if turn % 10 == 0:
+			pacmanLocation = rng.choice(locations)
+		states.append((ghost, pacmanLocation))
+		ghost = rng.choice(possibleGhostMoves(ghost, pacmanLocation, board))
+		if ghost.location == pacmanLocation:
+			ghost = GhostState(alive=True, ghostType=ghostType, location=rng.choice(locations), heading='', thinking=True)
+	return states
+
+def ghostCases() -> list[BenchmarkCase]:
+	"""Return a `possibleGhostMoves` case for each type of ghost."""
+
+	board = Board()
+	cases = []
+	for ghostType in 'RSCBO':
+		states = ghostStates(board, ghostType, 500)
+		def run(states=states):
+			for (state, pacmanLocation) in states:
+				possibleGhostMoves(state, pacmanLocation, board)
+		cases.append(BenchmarkCase(f'possibleGhostMoves[{ghostType}]', 'Ghost', lambda run=run: run, calls=len(states)))
+	return cases
+
+def filterCases(particleCounts: list[int]) -> list[BenchmarkCase]:
+	"""Return cases for the particle filter operations with each number of particles."""
+
+	board = Board()
+	locations = board.validLocations()
+	states = [ state for ghostType in 'RSCBO' for (state, pacmanLocation) in ghostStates(board, ghostType, 200, seed=1) ]
+	untyped = [ GhostState(alive=True, ghostType='', location=state.location, heading=state.heading, thinking=state.thinking) for state in states ]
+	pacmanLocation = board.getPacmanStart()
+
+	# Half of the particles keep their weight, so repeated reweighting never underflows
+	likelihood = lambda particle: 1. if particle.location.x % 2 else .5
+	moves = lambda particle: cachedGhostMoves(particle, pacmanLocation, board)
+	typedMoves = lambda particle, ghostType: possibleGhostMovesOfType(particle, ghostType, pacmanLocation, board)
+
+	def newFilter(count: int) -> ParticleFilter:
+		particleFilter = ParticleFilter(numpy.random.default_rng(0))
+		rng = random.Random(0)
+		for i in range(count):
+			particleFilter.addParticle(rng.choice(states))
+		return particleFilter
+
+	def newRaoBlackwellisedFilter(count: int) -> RaoBlackwellisedParticleFilter:
+		particleFilter = RaoBlackwellisedParticleFilter('RSCBO', rng=numpy.random.default_rng(0))
+		rng = random.Random(0)
+		for i in range(count):
+			particleFilter.addParticle(rng.choice(untyped))
+		return particleFilter
+
+	cases = []
+	for count in particleCounts:
+		for (className, create, advance) in ((ParticleFilter.__name__, newFilter, moves), (RaoBlackwellisedParticleFilter.__name__, newRaoBlackwellisedFilter, typedMoves)):
+			def setupAdvance(create=create, advance=advance, count=count):
+				particleFilter = create(count)
+				return lambda: particleFilter.advance(advance)
+			def setupReweight(create=create, count=count):
+				particleFilter = create(count)
+				return lambda: particleFilter.reweight(likelihood)
+			def setupResample(create=create, count=count):
+				particleFilter = create(count)
+				particleFilter.reweight(likelihood)
+				return particleFilter.resample
+			samples = 15 if count < 10000 else 5
+			cases += [
+				BenchmarkCase(f'{className}.advance[n={count}]', 'ParticleFilter', setupAdvance, samples=samples),
+				BenchmarkCase(f'{className}.reweight[n={count}]', 'ParticleFilter', setupReweight, samples=samples),
+				BenchmarkCase(f'{className}.resample[n={count}]', 'ParticleFilter', setupResample, samples=samples),
+			]
+	return cases
+
+def gameCases(agents: list[str], numGhosts: int = 3, timeLimit: float = .01, games: int = 5) -> list[BenchmarkCase]:
+	"""Return a case for each agent that plays complete seeded games, timing each turn."""
+
+	cases = []
+	for agent in agents:
+		agentClass = importlib.import_module(agent).MyAgent
+		def setup(agentClass=agentClass):
+			seeds = iter(range(1 << 20))
+			def run():
+				engine = GhostbustersEngine(agentClass, numGhosts, timeLimit, seed=next(seeds))
+				engine.play()
+				return engine.getTurn()
+			return run
+		cases.append(BenchmarkCase(f'game[{agent}]', 'Game', setup, samples=games))
+	return cases
+
+def allCases(agents: list[str], particleCounts: list[int]) -> list[BenchmarkCase]:
+	return boardCases() + ghostCases() + filterCases(particleCounts) + gameCases(agents)
+
+def environment() -> dict:
+	"""Describe the machine, software and source code that the benchmarks ran on."""
+
+	def git(*args: str) -> str | None:
+		try:
+			return subprocess.run(('git',) + args, capture_output=True, text=True, check=True).stdout.strip()
+		except (OSError, subprocess.CalledProcessError):
+			return None
+
+	status = git('status', '--porcelain', '--untracked-files=no')
+	return {
+		'time': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+		'commit': git('rev-parse', 'HEAD'),
+		'dirty': bool(status) if status is not None else None,
+		'python': platform.python_version(),
+		'numpy': numpy.__version__,
+		'platform': platform.platform(),
+		'processor': platform.processor() or platform.machine(),
+	}
+
+def runBenchmarks(cases: list[BenchmarkCase], pattern: str | None = None, sampleTime: float = .02, samples: int | None = None, verbose: bool = True) -> list[dict]:
+	"""Measure every case whose name matches the regular expression `pattern` (or every case if it is None)."""
+
+	results = []
+	for case in cases:
+		if pattern is None or re.search(pattern, case.name):
+			result = measure(case, sampleTime, samples)
+			results.append(result)
+			if verbose:
+				printResult(result)
+	return results
+
+def _formatTime(seconds: float) -> str:
+	"""Format a time with a suitable unit."""
+
+	for (unit, scale) in (('s', 1.), ('ms', 1e-3), ('us', 1e-6)):
+		if seconds >= scale:
+			return f'{seconds/scale:8.3f} {unit:2}'
+	return f'{seconds/1e-9:8.1f} ns'
+
+def printResult(result: dict) -> None:
+	"""Print one line for a benchmark result."""
+
+	spread = result['stdev'] / result['mean'] * 100 if result['mean'] > 0 else 0.
+	print(f'{result["name"]:52} {_formatTime(result["median"])} {_formatTime(result["min"])} {spread:6.1f}% {len(result["samples"]):4} x {result["number"]}', flush=True)
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Benchmark the Ghostbusters code')
+	parser.add_argument('-k', type=str, default=None, help="only run the cases whose names match this regular expression")
+	parser.add_argument('-o', type=str, default=None, help="file to write the results to as JSON")
+	parser.add_argument('--agents', type=str, nargs='*', default=['RandomAgent', 'MyAgent', 'MCTSAgent', 'ExpectimaxAgent'], help="agent modules to play games with")
+	parser.add_argument('--particles', type=int, nargs='+', default=[100, 1000, 10000], help="numbers of particles for the particle filter cases")
+	parser.add_argument('--quick', action='store_true', help="take fewer, shorter samples")
+	args = parser.parse_args()
+
+	(sampleTime, samples) = (.005, 5) if args.quick else (.02, None)
+	print(f'{"Benchmark":52} {"median":>11} {"min":>11} {"stdev":>7} samples')
+	results = runBenchmarks(allCases([ agent.split('.')[0] for agent in args.agents ], args.particles), args.k, sampleTime, samples)
+
+	if args.o:
+		with open(args.o, 'w') as f:
+			json.dump({ 'environment': environment(), 'results': results }, f, indent=1)
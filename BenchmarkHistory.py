@@ -0,0 +1,244 @@
+"""
+Keep a history of benchmark results and catch slowdowns.
+
+Every run of Benchmark.py that is recorded is appended, with the commit it was run on, to a history
+file (one JSON object per line).  A new run is compared case by case against a baseline run from the
+history with a Mann-Whitney U test on the raw samples: a case is flagged as slower (or faster) when
+the difference is statistically significant and its median changed by more than a threshold.  The
+test makes no assumption about the distribution of the timings, which are usually skewed by noise,
+and uses the exact distribution of its statistic for small samples.  Cases with too few samples to
+ever be significant are reported as untestable rather than unchanged.
+
+	python BenchmarkHistory.py run                  # benchmark, compare with the last commit, record
+	python BenchmarkHistory.py compare results.json # compare a saved run without recording it
+	python BenchmarkHistory.py record results.json  # add a saved run to the history
+	python BenchmarkHistory.py show -k possibleMoves
+
+`run` and `compare` exit with status 1 if a case matching `--fail-on` got significantly slower.
+"""
+
+from Benchmark import allCases, environment, runBenchmarks
+
+import argparse, json, math, os, re, statistics, sys
+import numpy
+
+defaultHistory = 'benchmark_history.jsonl'
+
+def loadHistory(path: str) -> list[dict]:
+	"""Return the recorded runs, oldest first, or an empty list if there is no history file."""
+
+	if not os.path.exists(path):
+		return []
+	with open(path) as f:
+		return [ json.loads(line) for line in f if line.strip() ]
+
+def recordRun(path: str, run: dict) -> None:
+	"""Append a run (as written by Benchmark.py) to the history file."""
+
+	with open(path, 'a') as f:
+		f.write(json.dumps(run) + '\n')
+
+def findBaseline(history: list[dict], run: dict, commit: str | None = None) -> dict | None:
+	"""
+	Return the run to compare with.
+
+	This is the most recent run on a commit starting with `commit` if it is given, and otherwise the
+	most recent run on a different commit from `run` (or None if there is no such run).
+	"""
+
+	runCommit = run['environment'].get('commit')
+	for previous in reversed(history):
+		previousCommit = previous['environment'].get('commit') or ''
+		if commit is not None:
+			if previousCommit.startswith(commit):
+				return previous
+		elif previousCommit != runCommit:
+			return previous
+	return None
+
+# Largest combined sample size for which the exact distribution of U is used
+exactLimit = 60
+
+def _ranks(sample1: list[float], sample2: list[float]) -> tuple[list[float], float]:
+	"""
+	Return the ranks of the combined samples (tied values get their average rank), with those of
+	`sample1` first, and the sum of `t**3 - t` over the groups of `t` tied values.
+	"""
+
+	values = sorted((value, i) for (i, value) in enumerate(sample1 + sample2))
+	ranks = [ 0. ] * len(values)
+	tieCorrection = 0.
+	i = 0
+	while i < len(values):
+		j = i
+		while j + 1 < len(values) and values[j + 1][0] == values[i][0]:
+			j += 1
+		for k in range(i, j + 1):
+			ranks[values[k][1]] = (i + j) / 2 + 1
+		ties = j - i + 1
+		tieCorrection += ties**3 - ties
+		i = j + 1
+	return (ranks, tieCorrection)
+
+def _exactPValue(ranks: list[float], n1: int) -> float:
+	"""
+	Return the exact two sided p-value of the rank sum of the first `n1` ranks.
+
+	Every way of choosing `n1` of the ranks is equally likely under the null hypothesis, so the
+	distribution of the rank sum is found by counting the subsets of each size with each sum.  Ranks
+	are doubled so that average ranks of ties are integers.
+	"""
+
+	doubled = [ int(round(2 * rank)) for rank in ranks ]
+	total = sum(doubled)
+	counts = numpy.zeros((n1 + 1, total + 1))
+	counts[0, 0] = 1.
+	for rank in doubled:
+		counts[1:, rank:] = counts[1:, rank:] + counts[:-1, :total + 1 - rank]
+	distribution = counts[n1] / counts[n1].sum()
+	observed = sum(doubled[:n1])
+	return min(1., 2 * min(distribution[:observed + 1].sum(), distribution[observed:].sum()))
+
+def minimumPValue(n1: int, n2: int) -> float:
+	"""Return the smallest two sided p-value that `mannWhitneyU` can give for samples of these sizes."""
+
+	if n1 == 0 or n2 == 0:
+		return 1.
+	if n1 + n2 <= exactLimit:
+		return min(1., 2 / math.comb(n1 + n2, n1))
+	return 0.
+
+def mannWhitneyU(sample1: list[float], sample2: list[float]) -> float:
+	"""
+	Return the two sided p-value of the Mann-Whitney U test that the samples come from the same distribution.
+
+	For up to `exactLimit` values in total the p-value comes from the exact distribution of the
+	statistic (allowing for ties), since the normal approximation is far too conservative for the
+	small samples of slow benchmarks.  For larger samples the normal approximation (with a
+	correction for ties and for continuity) is used.
+	"""
+
+	(n1, n2) = (len(sample1), len(sample2))
+	if n1 == 0 or n2 == 0:
+		return 1.
+
+	(ranks, tieCorrection) = _ranks(list(sample1), list(sample2))
+	if n1 + n2 <= exactLimit:
+		return _exactPValue(ranks, n1)
+
+	u = sum(ranks[:n1]) - n1 * (n1 + 1) / 2
+	n = n1 + n2
+	variance = n1 * n2 / 12 * ((n + 1) - tieCorrection / (n * (n - 1)))
+	if variance <= 0:
+		return 1.
+	z = (abs(u - n1 * n2 / 2) - .5) / math.sqrt(variance)
+	return min(1., math.erfc(max(z, 0.) / math.sqrt(2)))
+
+def compareRuns(baseline: dict, run: dict, alpha: float = .01, threshold: float = .05) -> list[dict]:
+	"""
+	Compare each case of a run with the same case in the baseline.
+
+	** Return value **
+
+	A dictionary for each case in both runs with its `name`, the baseline and new medians, their
+	`ratio` (above 1 is slower), the `pValue` and the `verdict`: 'slower' or 'faster' if the change is
+	significant at level `alpha` and larger than `threshold` (as a fraction of the baseline median),
+	'untestable' if the runs have too few samples for any difference to be significant at level
+	`alpha`, and otherwise 'same'.
+	"""
+
+	baselineResults = { result['name'] : result for result in baseline['results'] }
+	comparisons = []
+	for result in run['results']:
+		old = baselineResults.get(result['name'])
+		if old is None:
+			continue
+		(oldMedian, newMedian) = (statistics.median(old['samples']), statistics.median(result['samples']))
+		ratio = newMedian / oldMedian if oldMedian > 0 else float('inf')
+		pValue = mannWhitneyU(old['samples'], result['samples'])
+		verdict = 'same'
+		if minimumPValue(len(old['samples']), len(result['samples'])) >= alpha:
+			verdict = 'untestable'
+		elif pValue < alpha and abs(ratio - 1) > threshold:
+			verdict = 'slower' if ratio > 1 else 'faster'
+		comparisons.append({ 'name': result['name'], 'baselineMedian': oldMedian, 'median': newMedian, 'ratio': ratio, 'pValue': pValue, 'verdict': verdict })
+	return comparisons
+
+def printComparisons(baseline: dict, comparisons: list[dict]) -> None:
+	"""Print a comparison as a table, marking significant changes."""
+
+	environment = baseline['environment']
+	print(f'Baseline: commit {(environment.get("commit") or "unknown")[:10]}{" (dirty)" if environment.get("dirty") else ""} from {environment.get("time")}')
+	print(f'{"Benchmark":52} {"baseline":>11} {"new":>11} {"change":>8} {"p":>8}')
+	for c in comparisons:
+		mark = { 'slower': '  SLOWER', 'faster': '  faster', 'same': '', 'untestable': '  too few samples' }[c['verdict']]
+		print(f'{c["name"]:52} {c["baselineMedian"]*1e6:9.3f}us {c["median"]*1e6:9.3f}us {(c["ratio"] - 1)*100:+7.1f}% {c["pValue"]:8.2g}{mark}')
+	untestable = sum(1 for c in comparisons if c['verdict'] == 'untestable')
+	if untestable:
+		print(f'Warning: {untestable} benchmark(s) have too few samples to ever be significant, so slowdowns in them cannot be detected')
+
+def regressions(comparisons: list[dict], pattern: str) -> list[dict]:
+	"""Return the significantly slower cases whose names match the regular expression `pattern`."""
+	return [ c for c in comparisons if c['verdict'] == 'slower' and re.search(pattern, c['name']) ]
+
+def showHistory(history: list[dict], pattern: str | None) -> None:
+	"""Print the median of each matching case in every recorded run."""
+
+	names = list(dict.fromkeys(result['name'] for run in history for result in run['results'] if pattern is None or re.search(pattern, result['name'])))
+	for name in names:
+		print(name)
+		for run in history:
+			for result in run['results']:
+				if result['name'] == name:
+					environment = run['environment']
+					print(f'\t{(environment.get("commit") or "unknown")[:10]} {environment.get("time")} {statistics.median(result["samples"])*1e6:11.3f}us')
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Track benchmark results over time and flag slowdowns')
+	parser.add_argument('command', choices=['run', 'compare', 'record', 'show'])
+	parser.add_argument('results', type=str, nargs='?', help="results file written by Benchmark.py -o (for compare and record)")
+	parser.add_argument('--history', type=str, default=defaultHistory, help="history file")
+	parser.add_argument('--baseline', type=str, default=None, help="commit (or prefix) to compare with (default: the most recent other commit)")
+	parser.add_argument('--alpha', type=float, default=.01, help="significance level")
+	parser.add_argument('--threshold', type=float, default=.05, help="smallest relative change in the median to report")
+	parser.add_argument('--fail-on', type=str, default='.', help="regular expression for the cases whose slowdown is an error")
+	parser.add_argument('-k', type=str, default=None, help="only use the cases whose names match this regular expression")
+	parser.add_argument('--agents', type=str, nargs='*', default=['RandomAgent', 'MyAgent'], help="agent modules to play games with (for run)")
+	parser.add_argument('--no-record', action='store_true', help="do not add the new run to the history (for run)")
+	args = parser.parse_args()
+
+	history = loadHistory(args.history)
+	if args.command == 'show':
+		showHistory(history, args.k)
+		sys.exit()
+
+	if args.command == 'run':
+		results = runBenchmarks(allCases(args.agents, [100, 1000, 10000]), args.k, verbose=False)
+		run = { 'environment': environment(), 'results': results }
+	else:
+		if args.results is None:
+			parser.error(f'{args.command} needs a results file')
+		with open(args.results) as f:
+			run = json.load(f)
+
+	if args.command == 'record':
+		recordRun(args.history, run)
+		sys.exit()
+
+	if args.k:
+		run['results'] = [ result for result in run['results'] if re.search(args.k, result['name']) ]
+
+	baseline = findBaseline(history, run, args.baseline)
+	if baseline is None:
+		print('No baseline in the history to compare with')
+		failed = []
+	else:
+		comparisons = compareRuns(baseline, run, args.alpha, args.threshold)
+		printComparisons(baseline, comparisons)
+		failed = regressions(comparisons, args.fail_on)
+
+	if args.command == 'run' and not args.no_record:
+		recordRun(args.history, run)
+	if failed:
+		print(f'{len(failed)} benchmark(s) got slower: {", ".join(c["name"] for c in failed)}')
+		sys.exit(1)
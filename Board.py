@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 import random
+import numpy
 
 @dataclass(frozen=True)
 class Coordinate:
@@ -21,12 +22,15 @@ class Board:
 	Each entry is W = wall, S = Pacman starting location, A/B = endpoints of the tunnel
 	to the other side of the board.
 	* `_size' (int): the width and height of the game board
+	* `_cellId` (dict[Coordinate, int]): the index of each valid location in `validLocations()`.
+	This is used to store data about each location in arrays.
 	"""
 	
 	_map: list[str]
 	_size: int
 	_mapDistance: dict[ tuple[Coordinate, Coordinate], int ]
-	_fieldOfPlay: set[Coordinate]
+	_fieldOfPlay: list[Coordinate]
+	_cellId: dict[Coordinate, int]
 	
 	def __init__(self):
 		self._map = [	'WWWWWWWWWWWWWWWWWWW', 
@@ -67,27 +71,32 @@ class Board:
 				elif entry == 'B':
 					self._tunnelB = Coordinate(x,y)
 					
-		# Calculate the distance from any two valid coordinates
-		self._mapDistance = { (location,location) : 0 for location in self._fieldOfPlay }
-		changed = True
-		explored = set()
-		while changed:
-			changed = False
-			currentDist = max(self._mapDistance.values())
-			for (loc1,loc2) in list(self._mapDistance.keys()):
-				if (loc1, loc2) not in explored:
-					explored.add((loc1, loc2))
-					if self._mapDistance[(loc1,loc2)] == currentDist:
-						for location in self.possibleMoves(loc1).values():
-							if (loc2, location) not in self._mapDistance:
-								self._mapDistance[(loc2, location)] = currentDist + 1
-								self._mapDistance[(location, loc2)] = currentDist + 1
-								changed = True
-						for location in self.possibleMoves(loc2).values():
-							if (loc1, location) not in self._mapDistance:
-								self._mapDistance[(loc1, location)] = currentDist + 1
-								self._mapDistance[(location, loc1)] = currentDist + 1
-								changed = True
+		# Number each valid location so that per-location data can be stored in arrays
+		self._cellId = { location : cellId for (cellId, location) in enumerate(self._fieldOfPlay) }
+		
+		# The moves from each location never change, so find them once
+		fieldOfPlay = set(self._fieldOfPlay)
+		self._possibleMoves = { location : self._findPossibleMoves(location, fieldOfPlay) for location in self._fieldOfPlay }
+		
+		# Calculate the distance from any two valid coordinates with a breadth first search from each location
+		neighbours = [ [ self._cellId[location] for location in self._possibleMoves[start].values() ] for start in self._fieldOfPlay ]
+		self._distanceArray = numpy.full((len(self._fieldOfPlay), len(self._fieldOfPlay)), -1, dtype=numpy.int32)
+		for source in range(len(self._fieldOfPlay)):
+			distances = self._distanceArray[source]
+			distances[source] = 0
+			frontier = [source]
+			while frontier:
+				nextFrontier = []
+				for cellId in frontier:
+					for neighbour in neighbours[cellId]:
+						if distances[neighbour] < 0:
+							distances[neighbour] = distances[cellId] + 1
+							nextFrontier.append(neighbour)
+				frontier = nextFrontier
+		self._distanceArray.setflags(write=False)
+		
+		self._mapDistance = { (location1, location2) : int(self._distanceArray[id1, id2]) 
+			for (location1, id1) in self._cellId.items() for (location2, id2) in self._cellId.items() }
 							
 		# Setup noisy distances
 		self._errorDistribution = [ 1.7**i for i in range(6) ]
@@ -126,15 +135,22 @@ class Board:
 		return		a dictionary maping possible directions (NESW) to 
 					the resulting coordinate of a move in that direction
 		"""
+		possiblities = self._possibleMoves.get(location)
+		if possiblities is None:
+			return self._findPossibleMoves(location, self._fieldOfPlay)
+		return dict(possiblities)
+		
+	def _findPossibleMoves(self, location: Coordinate, fieldOfPlay) -> dict[str, Coordinate]:
+		"""Work out the possible moves from a location given the collection of valid locations."""
 		possiblities = dict()		
 		
-		if Coordinate(location.x-1, location.y) in self._fieldOfPlay:
+		if Coordinate(location.x-1, location.y) in fieldOfPlay:
 			possiblities['W'] = Coordinate(location.x-1, location.y)
-		if Coordinate(location.x+1, location.y) in self._fieldOfPlay:
+		if Coordinate(location.x+1, location.y) in fieldOfPlay:
 			possiblities['E'] = Coordinate(location.x+1, location.y)
-		if Coordinate(location.x, location.y-1) in self._fieldOfPlay:
+		if Coordinate(location.x, location.y-1) in fieldOfPlay:
 			possiblities['N'] = Coordinate(location.x, location.y-1)
-		if Coordinate(location.x, location.y+1) in self._fieldOfPlay:
+		if Coordinate(location.x, location.y+1) in fieldOfPlay:
 			possiblities['S'] = Coordinate(location.x, location.y+1)
 		
 		# Special case for classical map for the tunnel from one side 
@@ -146,10 +162,18 @@ class Board:
 			
 		return possiblities
 
-	def validLocations(self) -> set[Coordinate]:
+	def validLocations(self) -> list[Coordinate]:
 		"""Return all of the valid locations for a ghost on the board."""
 		return self._fieldOfPlay
 		
+	def numCells(self) -> int:
+		"""Return the number of valid locations on the board."""
+		return len(self._fieldOfPlay)
+		
+	def cellId(self, location: Coordinate) -> int:
+		"""Return the index of a valid location in `validLocations()` (and in the board's arrays)."""
+		return self._cellId[location]
+		
 	@staticmethod
 	def manhattanDistance(location1: Coordinate, location2: Coordinate) -> int:
 		"""Return the Manhattan distance between two board locations"""
@@ -159,12 +183,24 @@ class Board:
 	def pathDistance(self, location1: Coordinate, location2: Coordinate) -> int:
 		"""Return the distance following a path on the board between two locations."""
 		return self._mapDistance[(location1, location2)]
+		
+	def pathDistanceArray(self) -> numpy.ndarray:
+		"""
+		Return the path distances between all valid locations as a read-only array.
+		
+		Entry `[i, j]` is the path distance between the locations with cell ids `i` and `j`.
+		"""
+		return self._distanceArray
 
-	def noisyDistance(self, location1:  Coordinate, location2: Coordinate) -> int:
-		"""Return a noisy Manhattan distance measurement between the two locations."""
+	def noisyDistance(self, location1:  Coordinate, location2: Coordinate, rng=random) -> int:
+		"""
+		Return a noisy Manhattan distance measurement between the two locations.
+		
+		The measurement error is drawn with `rng`, which can be a seeded `random.Random` for reproducible games.
+		"""
 		
 		m = self.manhattanDistance(location1, location2)
-		e = random.choices(list(range(len(self._errorDistribution))), weights=self._errorDistribution, k=1)[0] - len(self._errorDistribution)//2
+		e = rng.choices(list(range(len(self._errorDistribution))), weights=self._errorDistribution, k=1)[0] - len(self._errorDistribution)//2
 		return min(max(1,m+e), 2*self._size+2)
 		
 	def noisyDistanceProb(self, noisyDistance: int, actualDistance: int) -> float:
@@ -0,0 +1,116 @@
+"""
+The parts of the graphics that do not depend on how they are drawn.
+
+`GraphicsObserver` drives any object with the methods of `GhostbusterGraphics`: the Tk window in
+Graphics.py or the images drawn by `RasterGraphics`.  Nothing here imports cs1graphics, so games can
+be drawn into images where Tkinter is not available.
+"""
+
+from Engine import GameObserver
+import numpy
+
+intensityPower = .2
+
+def ghostBaseColors(numGhosts):
+	"""Return the (r, g, b) colour of each ghost, spread evenly around the colour wheel."""
+	colors = []
+	for i in range(numGhosts):
+		angle = i*360/numGhosts
+		if angle <= 60:
+			a = angle
+			colors.append( (255, int(a/60*255), 0) )
+		elif angle <= 120:
+			a = angle - 60
+			colors.append( (int(255 - a/60*255), 255, 0) )
+		elif angle <= 180:
+			a = angle - 120
+			colors.append( (0, 255, int(a/60*255)) )
+		elif angle <= 240:
+			a = angle - 180
+			colors.append( (0, int(255 - a/60*255), 255) )
+		elif angle <= 300:
+			a = angle - 240
+			colors.append( (int(a/60*255), 0, 255) )
+		elif angle <= 360:
+			a = angle - 300
+			colors.append( (255, 0, int(255 - a/60*255)) )
+	return colors
+
+def blendedColors(probabilityArray, baseColors, numCells):
+	"""
+	Return the colour of each cell (an array of shape (numCells, 3)) for the ghosts' position probabilities.
+	
+	Each ghost's probabilities (an array indexed by cell id, or None if it has been caught) add its
+	base colour to every cell, with an intensity of the probability to the power `intensityPower`.
+	"""
+	colors = numpy.zeros((numCells, 3))
+	for ghostId, probabilities in enumerate(probabilityArray):
+		if probabilities is not None:
+			colors += numpy.power(probabilities, intensityPower)[:, None] * baseColors[ghostId]
+	return numpy.minimum(colors.astype(int), 255)
+
+class GraphicsObserver(GameObserver):
+	"""
+	Shows the progress of a game with a GhostbusterGraphics or RasterGraphics instance.
+	
+	** Member data **
+	
+	* `_graphics` (GhostbusterGraphics | RasterGraphics): the graphics to update
+	* `_informationLevel` (int): 1 or more shows the agent's predictions and 2 or more also shows the actual ghosts
+	* `_stepFrames` (bool): if True a frame is drawn after each step of a turn, and otherwise only at the end of each turn
+	"""
+	
+	def __init__(self, graphics, informationLevel: int, stepFrames: bool = False):
+		self._graphics = graphics
+		self._informationLevel = informationLevel
+		self._stepFrames = stepFrames
+		
+	def _stepFrame(self):
+		if self._stepFrames:
+			self._graphics.refresh()
+		
+	def gameStarted(self, engine):
+		self._graphics.movePacman(engine.getPacman().getState().location)
+		if self._informationLevel >= 2:
+			for ghostId, ghost in enumerate(engine.getGhosts()):
+				self._graphics.moveGhost(ghostId, ghost.location)
+				self._graphics.identifyGhostType(ghostId, ghost.ghostType)
+		self._graphics.refresh()
+				
+	def observationsMade(self, engine, observations):
+		location = engine.getPacman().getState().location
+		self._graphics.drawObservations((location.x, location.y), observations)
+		self._stepFrame()
+		
+	def pacmanMoved(self, engine, action):
+		self._graphics.movePacman(engine.getPacman().getState().location)
+		self._stepFrame()
+		
+	def predictionsRequested(self, engine):
+		if self._informationLevel >= 1:
+			allDistributions = []
+			for ghostId, ghost in enumerate(engine.getGhosts()):
+				if ghost.alive:
+					self._graphics.updateGhostType(ghostId, engine.getAgent().ghostTypeDistribution(ghostId))
+					allDistributions.append(engine.getAgent().ghostPositionArray(ghostId))
+				else:
+					allDistributions.append(None)
+			self._graphics.updateGhostPositions(allDistributions)
+			self._stepFrame()
+			
+	def ghostCaught(self, engine, ghostId, ranIntoPacman):
+		self._graphics.moveGhost(ghostId, engine.getGhosts()[ghostId].location)
+		
+	def ghostsMoved(self, engine):
+		if self._informationLevel >= 2:
+			for ghostId, ghost in enumerate(engine.getGhosts()):
+				self._graphics.moveGhost(ghostId, ghost.location)
+		self._stepFrame()
+				
+	def turnEnded(self, engine):
+		self._graphics.updateScoreAndTurn(engine.getScore(), engine.getTurn())
+		self._graphics.refresh()
+		
+	def gameEnded(self, engine):
+		self._graphics.movePacman(engine.getPacman().getState().location)
+		self._graphics.refresh()
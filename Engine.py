@@ -0,0 +1,301 @@
+"""
+The rules of Ghostbusters, without any output.
+
+`GhostbustersEngine` plays the game one turn at a time with `step` (or a whole game with `play`).  It
+never prints or draws anything; instead it tells its observers what happens during each turn.  Console
+output, graphics and pauses between turns are all observers added by Play.py, so a game without any
+observers costs little more than the agent's own computation.
+
+The events in each turn are, in order:
+
+* `turnStarted`
+* `observationsMade`: the noisy distances have been measured
+* `pacmanMoved`: the agent has chosen its move and Pacman has made it
+* `predictionsRequested`: a chance to show the agent's predictions before any ghost is caught
+* `ghostCaught`: once for each ghost caught, either by Pacman's move or by the ghost running into Pacman
+* `ghostsMoved`: the ghosts have moved (and any that ran into Pacman have been caught)
+* `turnEnded`: the score has been updated
+
+`gameStarted` is sent before the first turn and `gameEnded` after the last.
+
+The time spent in each phase of a turn (including each kind of observer) can be measured by giving
+the engine a `Timing.PhaseTimer` with `setTimer`.
+
+In a game created with a `seed`, the sensor noise, the ghosts and the agent each get their own
+random number stream derived from the seed.  The same seed gives the same game only for agents
+whose choices do not depend on wall-clock time (such as MyAgent).  Agents that search until their
+time limit (such as MCTSAgent and ExpectimaxAgent) search further on some turns than on others, so
+they can play a different game with the same seed.  Different agents playing with the same seed
+start with the same ghosts and get the same random numbers, but the games differ once Pacman's
+moves differ.
+"""
+
+from Ghost import *
+from Pacman import *
+from Board import *
+from Agent import *
+from AgentProcess import ProcessAgent, seedAgentRandomness
+from Timing import NullTimer
+
+import random
+import numpy.random
+
+caughtGhost = GhostState(alive=False, ghostType='', location=Coordinate(0,0), heading='', thinking=False)
+maxTurns = 1000
+
+def _streamSeed(seedSequence: numpy.random.SeedSequence) -> int:
+	"""Return a 128 bit integer seed from a seed sequence."""
+	return int.from_bytes(seedSequence.generate_state(4).tobytes(), 'little')
+
+class GameObserver:
+	"""
+	Base class for objects that are told about the events in a game of Ghostbusters.
+
+	Overload the methods for the events of interest; the others do nothing.  Each method receives
+	the engine, whose state can be inspected with its accessor methods.
+
+	The engine only calls the methods for the events that `handles` accepts, so events that an
+	observer ignores cost nothing.
+	"""
+
+	events = ('gameStarted', 'turnStarted', 'observationsMade', 'pacmanMoved', 'predictionsRequested',
+		'ghostCaught', 'ghostsMoved', 'turnEnded', 'gameEnded')
+
+	def handles(self, event: str) -> bool:
+		"""Return True if the observer wants to be told about an event; by default, the events whose methods are overloaded."""
+		return getattr(type(self), event) is not getattr(GameObserver, event)
+
+	def gameStarted(self, engine: 'GhostbustersEngine') -> None:
+		pass
+
+	def turnStarted(self, engine: 'GhostbustersEngine') -> None:
+		pass
+
+	def observationsMade(self, engine: 'GhostbustersEngine', observations: list[int]) -> None:
+		pass
+
+	def pacmanMoved(self, engine: 'GhostbustersEngine', action: str) -> None:
+		pass
+
+	def predictionsRequested(self, engine: 'GhostbustersEngine') -> None:
+		pass
+
+	def ghostCaught(self, engine: 'GhostbustersEngine', ghostId: int, ranIntoPacman: bool) -> None:
+		pass
+
+	def ghostsMoved(self, engine: 'GhostbustersEngine') -> None:
+		pass
+
+	def turnEnded(self, engine: 'GhostbustersEngine') -> None:
+		pass
+
+	def gameEnded(self, engine: 'GhostbustersEngine') -> None:
+		pass
+
+class GhostbustersEngine:
+	"""
+	Plays a game of Ghostbusters without any output.
+
+	** Member data **
+
+	* `_agent` (Agent): the agent instance that makes Pacmans decision
+	* `_board` (Board): the game board
+	* `_pacman` (Pacman): stores Pacman's current state
+	* `_ghosts` (list[GhostState]): the state of each ghost
+	* `_numGhosts` (int): the number of ghosts in the game
+	* `_timeLimit` (float): the time the agent has to choose each move
+	* `_seed` (int | None): the seed for the game's random numbers, or None if it is not seeded
+	* `_score` (int): the current score
+	* `_turn` (int): the number of the current (or last) turn
+	* `_observers` (list[GameObserver]): the observers told about each event
+	* `_listeners` (dict[str, list[tuple]]): for each event, the (class name, method) of each observer that handles it
+	* `_sensorRng` (random.Random): the random number generator for the noisy distances
+	* `_ghostRng` (random.Random): the random number generator for the ghosts' starting states and moves
+	* `_timer` (NullTimer): measures the time spent in each phase of a turn
+	"""
+
+	_agent: BaseAgent
+	_board: Board
+	_pacman: Pacman
+	_ghosts: list[GhostState]
+
+	def __init__(self, pacmanAgentClass, numGhosts: int, timeLimit: float, agentProcess: bool = False, seed: int | None = None):
+		"""
+		Initialize a new game of Ghostbusters
+
+		If `agentProcess` is True, the agent runs in a separate process and is stopped if it
+		does not finish its move within the time limit.
+
+		If `seed` is given, the game's random numbers come from independent streams derived from it
+		and the agent's random number generators are seeded before the agent is created.  Otherwise
+		the global `random` module is used.  Seeding only reproduces a game exactly for agents whose
+		choices do not depend on wall-clock time (see the module documentation).
+		"""
+
+		if seed is None:
+			(self._sensorRng, self._ghostRng, agentSeed) = (random, random, None)
+		else:
+			(sensorSeed, ghostSeed, agentSeed) = (_streamSeed(stream) for stream in numpy.random.SeedSequence(seed).spawn(3))
+			(self._sensorRng, self._ghostRng) = (random.Random(sensorSeed), random.Random(ghostSeed))
+
+		self._board = Board()
+		self._pacman = Pacman(self._board)
+		if agentProcess:
+			self._agent = ProcessAgent(pacmanAgentClass, self._board, self._pacman, numGhosts, timeLimit, seed=agentSeed)
+		else:
+			if agentSeed is not None:
+				seedAgentRandomness(agentSeed)
+			self._agent = pacmanAgentClass(self._board, self._pacman, numGhosts, timeLimit)
+		self._numGhosts = numGhosts
+		self._timeLimit = timeLimit
+		self._seed = seed
+		self._ghosts = [ randomGhost(self._board, self._ghostRng) for ghostId in range(numGhosts) ]
+		self._score = 0
+		self._turn = 0
+		self._observers = []
+		self._listeners = { event : [] for event in GameObserver.events }
+		self._timer = NullTimer()
+
+	def addObserver(self, observer: GameObserver) -> None:
+		"""Add an observer that is told about each event in the game."""
+		self._observers.append(observer)
+		for event in GameObserver.events:
+			if observer.handles(event):
+				self._listeners[event].append((type(observer).__name__, getattr(observer, event)))
+
+	def setTimer(self, timer: NullTimer) -> None:
+		"""Measure the time spent in each phase of every turn with a timer (such as a `Timing.PhaseTimer`)."""
+		self._timer = timer
+
+	def getBoard(self) -> Board:
+		return self._board
+
+	def getPacman(self) -> Pacman:
+		return self._pacman
+
+	def getAgent(self) -> BaseAgent:
+		return self._agent
+
+	def getGhosts(self) -> list[GhostState]:
+		"""Return the true state of each ghost."""
+		return self._ghosts
+
+	def getNumGhosts(self) -> int:
+		return self._numGhosts
+
+	def getTimeLimit(self) -> float:
+		return self._timeLimit
+
+	def getSeed(self) -> int | None:
+		return self._seed
+
+	def getScore(self) -> int:
+		return self._score
+
+	def getTurn(self) -> int:
+		return self._turn
+
+	def isOver(self) -> bool:
+		"""Check if all of the ghosts have been caught or the last turn has been played."""
+		return self._turn >= maxTurns or not any(ghost.alive for ghost in self._ghosts)
+
+	def _checkCaught(self, ranIntoPacman: bool) -> None:
+		"""Catch any ghost at Pacman's location and tell the agent which ghosts were not caught."""
+
+		location = self._pacman.getState().location
+		for ghostId, ghost in enumerate(self._ghosts):
+			if ghost.alive and ghost.location == location:
+				self._ghosts[ghostId] = caughtGhost
+				self._score += 1000
+				self._agent.ghostCaught(ghostId)
+				self._timer.lap('catchCheck')
+				self._notify('ghostCaught', ghostId, ranIntoPacman)
+			else:
+				self._agent.ghostNotCaught(ghostId)
+		self._timer.lap('catchCheck')
+
+	def _notify(self, event: str, *args) -> None:
+		"""Tell the observers that handle an event about it, timing each observer."""
+
+		for (name, method) in self._listeners[event]:
+			method(self, *args)
+			self._timer.lap(name)
+
+	def start(self) -> None:
+		"""Tell the observers that the game is starting.  This is called by `play` before the first turn."""
+
+		self._notify('gameStarted')
+
+	def step(self) -> bool:
+		"""
+		Play one turn of the game.
+
+		** Return value **
+
+		True if the game continues after this turn
+		"""
+
+		timer = self._timer
+		timer.start()
+		self._turn += 1
+		self._notify('turnStarted')
+
+		# Get noisy distance measurements
+		location = self._pacman.getState().location
+		observations = [ self._board.noisyDistance(location, ghost.location, self._sensorRng) if ghost.alive else 0 for ghost in self._ghosts ]
+		timer.lap('sensor')
+		self._notify('observationsMade', observations)
+
+		# Move Pacman and check if any ghosts are caught
+		self._agent.pauseThinking()
+		self._agent.startTurn()
+		self._agent.findMove(observations)
+		self._agent.endTurn()
+		action = self._agent.getMove()
+		timer.lap('findMove')
+		self._pacman.move(action)
+		timer.lap('pacmanMove')
+		self._notify('pacmanMoved', action)
+		self._notify('predictionsRequested')
+
+		self._checkCaught(False)
+
+		# Move ghosts and see if any run into Pacman
+		location = self._pacman.getState().location
+		self._ghosts = [ moveGhost(ghost, location, self._board, self._ghostRng) for ghost in self._ghosts ]
+		timer.lap('ghostMove')
+		self._agent.ghostsHaveMoved()
+		timer.lap('ghostsHaveMoved')
+		self._checkCaught(True)
+		self._agent.resumeThinking()
+		timer.lap('resumeThinking')
+		self._notify('ghostsMoved')
+
+		# Update scores
+		self._score -= sum(1 for ghost in self._ghosts if ghost.alive)
+		timer.lap('score')
+		self._notify('turnEnded')
+		timer.endTurn()
+
+		return not self.isOver()
+
+	def finish(self) -> None:
+		"""Stop the agent and tell the observers that the game is over.  This is called by `play` after the last turn."""
+
+		self._agent.stopThinking()
+		self._notify('gameEnded')
+
+	def play(self) -> int:
+		"""
+		Play a game of pacman.
+
+		** Return value **
+
+		The score of the game
+		"""
+
+		self.start()
+		while self.step():
+			pass
+		self.finish()
+		return self._score
@@ -0,0 +1,168 @@
+"""
+Expectimax agent for Ghostbusters.
+
+The agent looks a fixed number of moves ahead.  Pacman's moves are max nodes and the ghosts' moves
+are chance nodes, which are worked out exactly by moving every state in the belief about each ghost
+with `possibleGhostMoves` (through `cachedGhostMoves`).  The beliefs come from the particle filters
+maintained by `ParticleAgent`.
+
+The same Pacman location and beliefs are often reached by different sequences of moves, so the value
+of each searched node is stored in a transposition table keyed by Pacman's cell, the remaining depth
+and a signature of the beliefs (their states and rounded probabilities, so keys are compared by
+equality rather than only by hash).  The search is repeated with increasing depth until time runs
+out and the move from the deepest complete search is made.
+"""
+
+from ParticleAgent import *
+
+class _OutOfTime(Exception):
+	"""Raised inside the search when the turn is about to expire."""
+	pass
+
+class MyAgent(ParticleAgent):
+	"""
+	Agent that chooses moves with a depth-limited expectimax search over its beliefs about the ghosts.
+
+	** Member data **
+
+	*`_moves` (dict[Coordinate, tuple]): the (direction, location) pairs that can be reached from each location
+	*`_table` (dict): the transposition table for the current turn, mapping node keys to values
+	*`_nodes` (int): the number of nodes searched this turn
+
+	A belief is a tuple with a dictionary for each ghost mapping ghost states to probabilities.  The
+	probabilities add up to the chance that the ghost has not been caught yet.  Values are measured in
+	thousands of points, so catching a ghost is worth 1 and each ghost that is still free at the end
+	of a turn costs .001.
+	"""
+
+	maxDepth = 12
+	maxStates = 50
+	minProbability = 1e-4
+	signatureDigits = 3
+	distancePenalty = .002
+	checkInterval = 256
+
+	def __init__(self, board: Board, pacman: Pacman, numGhosts: int, timeLimit: float):
+		"""Create a new agent instance."""
+		ParticleAgent.__init__(self, board, pacman, numGhosts, timeLimit)
+		self._moves = { location : tuple(board.possibleMoves(location).items()) for location in board.validLocations() }
+		self._table = {}
+		self._nodes = 0
+
+	def findMove(self, observations: list[int]) -> None:
+		"""
+		Determine the move that Pacman will make based on the observations and current state.
+
+		** Parameter **
+
+		*`observations` (list[int]): a list of integers of the noisy distances measured to each ghost.
+
+		The beliefs are updated with the observations and then searched with iterative deepening.
+		"""
+
+		location = self._pacman.getState().location
+		self.setMove(self._moves[location][0][0])
+
+		self.updateBeliefs(observations)
+		beliefs = tuple(self._prune(self.ghostStateDistribution(ghostId)) for ghostId in self.liveGhosts())
+		if not beliefs:
+			return
+
+		self._table = {}
+		self._nodes = 0
+		def deepen(iteration: int) -> str:
+			depth = iteration + 1
+			if depth > self.maxDepth:
+				raise StopIteration
+			try:
+				return self._bestMove(location, beliefs, depth)
+			except _OutOfTime:
+				raise StopIteration
+		self.anytimeSearch(deepen, checkInterval=1)
+
+	def _prune(self, belief: dict[GhostState, float]) -> dict[GhostState, float]:
+		"""Keep only the most likely states of a belief, without changing its total probability."""
+
+		if len(belief) > self.maxStates:
+			total = sum(belief.values())
+			belief = dict(sorted(belief.items(), key=lambda item: item[1], reverse=True)[:self.maxStates])
+			factor = total / sum(belief.values())
+			belief = { state : probability * factor for (state, probability) in belief.items() }
+		return belief
+
+	def _signature(self, belief: dict[GhostState, float]) -> frozenset:
+		"""Return a key for a belief that ignores tiny differences in probability."""
+		return frozenset((state, round(probability, self.signatureDigits)) for (state, probability) in belief.items())
+
+	def _bestMove(self, location: Coordinate, beliefs: tuple, depth: int) -> str:
+		"""Return the move with the highest expected value when searching `depth` moves ahead."""
+
+		(bestMove, bestValue) = (None, float('-inf'))
+		for (direction, newLocation) in self._moves[location]:
+			value = self._moveValue(newLocation, beliefs, depth)
+			if value > bestValue:
+				(bestMove, bestValue) = (direction, value)
+		return bestMove
+
+	def _moveValue(self, location: Coordinate, beliefs: tuple, depth: int) -> float:
+		"""
+		Return the expected value of Pacman moving to a location with `depth` moves left (including this one).
+
+		Ghosts at the new location are caught, then every ghost state moves (the chance node), then any
+		ghost that moved onto Pacman is caught, exactly as in the game.
+		"""
+
+		self._nodes += 1
+		if self._nodes % self.checkInterval == 0 and not self.timeRemaining():
+			raise _OutOfTime()
+
+		reward = 0.
+		newBeliefs = []
+		for belief in beliefs:
+			moved = {}
+			for (state, probability) in belief.items():
+				if state.location == location:
+					reward += probability
+					continue
+				results = cachedGhostMoves(state, location, self._board)
+				p = probability / len(results)
+				for result in results:
+					moved[result] = moved.get(result, 0.) + p
+
+			newBelief = {}
+			for (state, probability) in moved.items():
+				if state.location == location:
+					reward += probability
+				elif probability >= self.minProbability:
+					newBelief[state] = probability
+			newBelief = self._prune(newBelief)
+			reward -= .001 * sum(newBelief.values())
+			newBeliefs.append(newBelief)
+
+		return reward + self._value(location, tuple(newBeliefs), depth - 1)
+
+	def _value(self, location: Coordinate, beliefs: tuple, depth: int) -> float:
+		"""Return the expected value of the best sequence of `depth` moves from a location."""
+
+		if depth == 0 or all(not belief for belief in beliefs):
+			return self._evaluate(location, beliefs)
+
+		key = (self._board.cellId(location), depth, tuple(self._signature(belief) for belief in beliefs))
+		value = self._table.get(key)
+		if value is None:
+			value = max(self._moveValue(newLocation, beliefs, depth) for (direction, newLocation) in self._moves[location])
+			self._table[key] = value
+		return value
+
+	def _evaluate(self, location: Coordinate, beliefs: tuple) -> float:
+		"""Estimate the value of a leaf: being close (on average) to some ghost is good."""
+
+		closest = float('inf')
+		for belief in beliefs:
+			total = sum(belief.values())
+			if total > 0:
+				averageDistance = sum(probability * self._board.pathDistance(location, state.location) for (state, probability) in belief.items()) / total
+				closest = min(closest, averageDistance)
+		if closest == float('inf'):
+			return 0.
+		return -self.distancePenalty * closest
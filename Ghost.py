@@ -54,6 +54,7 @@ from Pacman import *
 from dataclasses import dataclass
 import random
 import copy
+import weakref
 
 @dataclass(frozen=True)
 class GhostState:
@@ -83,7 +84,7 @@ class GhostState:
 	heading: str
 	thinking: bool
 	
-def moveGhost(state: GhostState, pacmanLocation: Coordinate, board: Board) -> GhostState:
+def moveGhost(state: GhostState, pacmanLocation: Coordinate, board: Board, rng=random) -> GhostState:
 	"""
 	Advance the ghosts position to the next state.
 	
@@ -92,12 +93,59 @@ def moveGhost(state: GhostState, pacmanLocation: Coordinate, board: Board) -> Gh
 	* `state` (GhostState): the current state of the ghost
 	* `pacmanLocation` (Coordinate): the current location of Pacman
 	* `board` (Board): the board/map for the game
+	* `rng`: the random number generator used to choose between the possible moves
 	
 	**Return**
 	
 	The resulting ghost state
 	"""
-	return random.choice(possibleGhostMoves(state, pacmanLocation, board))
+	return rng.choice(cachedGhostMoves(state, pacmanLocation, board))
+	
+# Results of possibleGhostMoves for each board, keyed by the ghost state (or by (state, ghostType) for
+# possibleGhostMovesOfType).  Each entry is the tuple of results if they do not depend on Pacman
+# (see ghostMoveDependsOnPacman), and otherwise a dictionary from Pacman's location to the results.
+_ghostMoveCache = weakref.WeakKeyDictionary()
+_maxGhostMoveCacheSize = 100000
+
+def cachedGhostMoves(state: GhostState, pacmanLocation: Coordinate, board: Board) -> tuple[GhostState, ...]:
+	"""
+	Find all possible results for the ghost moving, remembering the results for next time.
+	
+	This gives the same results as `possibleGhostMoves` (as a tuple) but only works them out the
+	first time a particular ghost state is seen, or for a ghost whose move depends on Pacman, the
+	first time the ghost state and Pacman location are seen together.  It is used by the game and
+	by agents that simulate many ghost moves.
+	"""
+	
+	cache = _ghostMoveCache.get(board)
+	if cache is None:
+		cache = _ghostMoveCache[board] = {}
+		
+	entry = cache.get(state)
+	if entry is None:
+		if len(cache) >= _maxGhostMoveCacheSize:
+			cache.clear()
+		entry = cache[state] = {} if ghostMoveDependsOnPacman(state, board) else tuple(possibleGhostMoves(state, pacmanLocation, board))
+	if type(entry) is tuple:
+		return entry
+		
+	result = entry.get(pacmanLocation)
+	if result is None:
+		result = entry[pacmanLocation] = tuple(possibleGhostMoves(state, pacmanLocation, board))
+	return result
+	
+def ghostMoveDependsOnPacman(state: GhostState, board: Board) -> bool:
+	"""
+	Return True if the possible results of a ghost moving depend on where Pacman is.
+	
+	Ghosts that are caught, moving down a corridor, pausing at an intersection or of the random
+	type move the same way wherever Pacman is.  This must be kept consistent with `possibleGhostMoves`.
+	"""
+	
+	if not state.alive or state.ghostType == 'R':
+		return False
+	numOptions = sum(1 for direction in board.possibleMoves(state.location) if direction != board.reverseDirection[state.heading])
+	return numOptions >= 2 and state.thinking
 	
 def possibleGhostMoves(state: GhostState, pacmanLocation: Coordinate, board: Board) -> list[GhostState]:
 	"""
@@ -191,13 +239,62 @@ def possibleGhostMoves(state: GhostState, pacmanLocation: Coordinate, board: Boa
 	
 	return possibleMoves
 
-def randomGhost(board: Board) -> GhostState:
+def possibleGhostMovesOfType(state: GhostState, ghostType: str, pacmanLocation: Coordinate, board: Board) -> tuple[GhostState, ...]:
+	"""
+	Find all possible results for a ghost moving if it has a particular behavior type.
+
+	**Parameters**
+
+	* `state` (GhostState): the current state of the ghost.  Its `ghostType` is ignored.
+	* `ghostType` (str): the behavior type (RSCBO) to use for the move
+	* `pacmanLocation` (Coordinate): the current location of Pacman
+	* `board` (Board): the board/map for the game
+
+	**Return**
+
+	A tuple of possible results (all equally likely), with the same `ghostType` as `state`.  This
+	is used by filters that track the ghost type separately from the rest of the ghost state.
+	The results are remembered in the same way as by `cachedGhostMoves`.
+	"""
+
+	if not state.alive:
+		return (state,)
+
+	cache = _ghostMoveCache.get(board)
+	if cache is None:
+		cache = _ghostMoveCache[board] = {}
+		
+	key = (state, ghostType)
+	entry = cache.get(key)
+	if entry is None:
+		if len(cache) >= _maxGhostMoveCacheSize:
+			cache.clear()
+		typedState = GhostState(alive=True, ghostType=ghostType, location=state.location, heading=state.heading, thinking=state.thinking)
+		if ghostMoveDependsOnPacman(typedState, board):
+			entry = cache[key] = {}
+		else:
+			entry = cache[key] = _withGhostType(cachedGhostMoves(typedState, pacmanLocation, board), state.ghostType)
+	if type(entry) is tuple:
+		return entry
+		
+	result = entry.get(pacmanLocation)
+	if result is None:
+		typedState = GhostState(alive=True, ghostType=ghostType, location=state.location, heading=state.heading, thinking=state.thinking)
+		result = entry[pacmanLocation] = _withGhostType(cachedGhostMoves(typedState, pacmanLocation, board), state.ghostType)
+	return result
+
+def _withGhostType(states: tuple[GhostState, ...], ghostType: str) -> tuple[GhostState, ...]:
+	"""Return the ghost states with their `ghostType` replaced."""
+	return tuple(GhostState(alive=state.alive, ghostType=ghostType, location=state.location, heading=state.heading, thinking=state.thinking) for state in states)
+
+def randomGhost(board: Board, rng=random) -> GhostState:
 	"""
 	Return a random ghost starting state.
 	
-	**Parameter**
+	**Parameters**
 	
 	* `board` (Board): the board the the ghost will be placed on.
+	* `rng`: the random number generator used to choose the ghost
 	
 	The ghost will be choosen randomly among the five different behaviors and placed
 	randomly on the board at least 3 moves away from Pacman's starting location.  The
@@ -206,7 +303,7 @@ def randomGhost(board: Board) -> GhostState:
 	
 	valid = False
 	while not valid:
-		ghost = GhostState(alive=True, ghostType = random.choice('RSCBO'), location = random.choice(board.validLocations()), heading='', thinking=True)
+		ghost = GhostState(alive=True, ghostType = rng.choice('RSCBO'), location = rng.choice(board.validLocations()), heading='', thinking=True)
 		valid = Board.manhattanDistance(ghost.location, board.getPacmanStart()) > 2
 
 	return ghost
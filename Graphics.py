@@ -1,18 +1,22 @@
 from Board import *
+from Display import GraphicsObserver, ghostBaseColors, blendedColors, intensityPower
 from cs1graphics import *
 from math import pow
-
-intensityPower = .2
+import numpy
 
 class GhostbusterGraphics:
 	"""
 	Class for managing the graphics for a game of Ghostbusters.
+	
+	Changes are drawn in frames: unless `batched` is False, nothing is shown until `refresh` is
+	called, so all of the changes made in a turn are drawn in one redraw.
 	"""
 	
-	def __init__(self, board, numGhosts, width):
+	def __init__(self, board, numGhosts, width, batched=True):
 		self._board = board
 		self._scale = width / (self._board.getSize() + 7)
 		self._canvas = Canvas(width, int(self._scale*self._board.getSize()), title='Ghostbusters')
+		self._canvas.setAutoRefresh(not batched)
 		self._canvas.setBackgroundColor('tan')
 		self._caughtGhosts = []
 		
@@ -27,31 +31,15 @@ class GhostbusterGraphics:
 					self._squares[Coordinate(x,y)].setFillColor('black')
 				self._canvas.add(self._squares[Coordinate(x,y)])
 				
+		# The squares of the valid locations by cell id, and the colour each was last given
+		self._cellSquares = [ self._squares[location] for location in self._board.validLocations() ]
+		self._squareColors = numpy.zeros((self._board.numCells(), 3), dtype=int)
+		
 		self._pacman = Circle(.4*self._scale, Point(-100,-100))
 		self._pacman.setFillColor('yellow')
 		self._canvas.add(self._pacman)
 		
-		self._ghostBaseColors = []
-		for i in range(numGhosts):
-			angle = i*360/numGhosts
-			if angle <= 60:
-				a = angle
-				self._ghostBaseColors.append( (255, int(a/60*255), 0) )
-			elif angle <= 120:
-				a = angle - 60
-				self._ghostBaseColors.append( (int(255 - a/60*255), 255, 0) )
-			elif angle <= 180:
-				a = angle - 120
-				self._ghostBaseColors.append( (0, 255, int(a/60*255)) )
-			elif angle <= 240:
-				a = angle - 180
-				self._ghostBaseColors.append( (0, int(255 - a/60*255), 255) )
-			elif angle <= 300:
-				a = angle - 240
-				self._ghostBaseColors.append( (int(a/60*255), 0, 255) )
-			elif angle <= 360:
-				a = angle - 300
-				self._ghostBaseColors.append( (255, 0, int(255 - a/60*255)) )
+		self._ghostBaseColors = ghostBaseColors(numGhosts)
 					
 		self._score = Text('Score: 0', .8*self._scale, Point((self._board.getSize()+3.5)*self._scale, self._scale))
 		self._score.setJustification('left')
@@ -94,6 +82,12 @@ class GhostbusterGraphics:
 			c.setBorderWidth(.05*self._scale)
 			self._circles.append(c)
 			self._canvas.add(c)
+		
+		self.refresh()
+		
+	def refresh(self):
+		"""Draw the changes made since the last frame."""
+		self._canvas.refresh()
 				
 	def movePacman(self, location):
 		self._pacman.moveTo((location.x+.5)*self._scale, (location.y+.5)*self._scale)
@@ -129,13 +123,14 @@ class GhostbusterGraphics:
 				int(pow(probabilities[t], intensityPower)*self._ghostBaseColors[ghostId][2]) ))
 				
 	def updateGhostPositions(self, probabilityArray):
-		for loc in self._board.validLocations():
-			colors = [0,0,0]
-			for ghostId, probabilities in enumerate(probabilityArray):
-				if probabilities is not None:
-					prob = pow(probabilities[loc], intensityPower)
-					for i in range(3):
-						colors[i] += prob*self._ghostBaseColors[ghostId][i]
-			for i,c in enumerate(colors):
-				colors[i] = min(255, int(c))
-			self._squares[loc].setFillColor(tuple(colors))
+		"""
+		Colour the squares by each ghost's probabilities (an array indexed by cell id, or None if caught).
+		
+		The colours of all of the squares are computed together and only the squares whose colour
+		changed since the last update are redrawn.
+		"""
+		colors = blendedColors(probabilityArray, self._ghostBaseColors, self._board.numCells())
+		
+		for cellId in numpy.flatnonzero((colors != self._squareColors).any(axis=1)).tolist():
+			self._cellSquares[cellId].setFillColor(tuple(colors[cellId].tolist()))
+		self._squareColors = colors
@@ -0,0 +1,130 @@
+"""
+Monte Carlo tree search agent for Ghostbusters.
+
+Each ghost is tracked with a `RaoBlackwellisedParticleFilter` (see `ParticleAgent`) that samples
+the ghost's location, heading and thinking state and keeps exact probabilities for its type.  To choose a move, the agent
+repeatedly:
+
+* samples a state (including a type) for every ghost from its belief,
+* walks down a tree of Pacman moves choosing moves with UCT (upper confidence bounds for trees),
+* plays out the rest of the game for a fixed number of turns on a `SimState`, moving the ghosts with
+	the game's own ghost behavior and Pacman with a simple chasing policy,
+* and adds the change in score to every tree node that was visited.
+
+This is repeated for as long as the time limit allows and the most visited move is made.
+"""
+
+from ParticleAgent import *
+from Simulation import *
+
+import math
+import random
+
+class _Node:
+	"""A node in the search tree for a sequence of Pacman moves."""
+
+	__slots__ = ('children', 'visits', 'total')
+
+	def __init__(self):
+		self.children = {}
+		self.visits = 0
+		self.total = 0.
+
+class MyAgent(ParticleAgent):
+	"""
+	Agent that chooses moves with Monte Carlo tree search over its beliefs about the ghosts.
+
+	** Member data **
+
+	*`_tables` (SimulationTables): the encoding of the board and ghost rules used by the simulations
+
+	Rewards are measured in thousands of points, so catching a ghost is worth 1 and each ghost that is
+	still free at the end of a turn costs .001.
+	"""
+
+	numSamples = 500
+	horizon = 20
+	exploration = .5
+	distancePenalty = .002
+	randomRolloutMove = .25
+
+	def __init__(self, board: Board, pacman: Pacman, numGhosts: int, timeLimit: float):
+		"""Create a new agent instance."""
+		ParticleAgent.__init__(self, board, pacman, numGhosts, timeLimit)
+		self._tables = simulationTables(board)
+
+	def findMove(self, observations: list[int]) -> None:
+		"""
+		Determine the move that Pacman will make based on the observations and current state.
+
+		** Parameter **
+
+		*`observations` (list[int]): a list of integers of the noisy distances measured to each ghost.
+
+		The beliefs are updated with the observations and then the tree is searched until time runs out.
+		"""
+
+		# Make sure there is a legal move even if the search gets no time
+		pacmanCell = self._board.cellId(self._pacman.getState().location)
+		self.setMove(self._tables.moves[pacmanCell][0][0])
+		
+		self.updateBeliefs(observations)
+		samples = [ [ self._tables.ghostStateId(state) for state in self.sampleGhostStates(ghostId, self.numSamples) ] for ghostId in self.liveGhosts() ]
+		if not samples:
+			return
+
+		root = _Node()
+		self.anytimeSearch(lambda iteration: self._search(root, SimState(self._tables, pacmanCell, [ ghostSamples[iteration % self.numSamples] for ghostSamples in samples ])))
+
+	def _search(self, root: _Node, state: SimState) -> str:
+		"""
+		Run one simulation from the root of the tree and return the most visited move.
+
+		** Parameters **
+
+		*`root` (_Node): the root of the search tree
+		*`state` (SimState): the starting position, with ghost states sampled from the beliefs
+		"""
+
+		distance = self._tables.distance
+		ghostCell = self._tables.ghostCell
+		node = root
+		path = [root]
+		inTree = True
+
+		for depth in range(self.horizon):
+			moves = state.legalMoves()
+
+			# Choose Pacman's move: UCT inside the tree and a chasing policy outside it
+			if inTree:
+				untried = [ move for move in moves if move[0] not in node.children ]
+				if untried:
+					heading = random.choice(untried)[0]
+					node.children[heading] = _Node()
+					inTree = False
+				else:
+					logVisits = math.log(node.visits)
+					heading = max(moves, key=lambda move: node.children[move[0]].total / node.children[move[0]].visits
+						+ self.exploration * math.sqrt(logVisits / node.children[move[0]].visits))[0]
+				node = node.children[heading]
+				path.append(node)
+			elif random.random() < self.randomRolloutMove:
+				heading = random.choice(moves)[0]
+			else:
+				fromPacman = distance[state.pacman]
+				target = min((ghostCell[ghost] for ghost in state.ghosts if ghost != 0), key=fromPacman.__getitem__)
+				heading = min(moves, key=lambda move: distance[move[1]][target])[0]
+
+			state.step(heading)
+			if not any(state.ghosts):
+				break
+
+		reward = state.score / 1000
+		if any(state.ghosts):
+			reward -= self.distancePenalty * min(distance[state.pacman][ghostCell[ghost]] for ghost in state.ghosts if ghost != 0)
+
+		for visited in path:
+			visited.visits += 1
+			visited.total += reward
+
+		return max(root.children.items(), key=lambda child: child[1].visits)[0]
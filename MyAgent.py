@@ -4,11 +4,28 @@ from Ghost import *
 from Agent import *
 
 from collections import defaultdict
+import numpy
 
 class MyAgent(BaseAgent):
+	"""
+	Template agent that keeps its predictions in arrays.
+	
+	** Member data **
+	
+	*`_positionBelief` (numpy.ndarray): row `ghostId` holds the probability of that ghost being in each
+	location, indexed by the board's cell ids (see `Board.cellId`).
+	*`_typeBelief` (numpy.ndarray): row `ghostId` holds the probability of that ghost having each type in 'RSCBO'.
+	*`_alive` (numpy.ndarray): whether each ghost is still in the game.
+	*`_distances` (numpy.ndarray): the board's path distances between every pair of cells.
+	"""
+	
 	def __init__(self, board, pacman, numGhosts, timeLimit):
 		"""Create a new agent instance."""
 		BaseAgent.__init__(self, board, pacman, numGhosts, timeLimit)
+		self._positionBelief = numpy.full((numGhosts, board.numCells()), 1/board.numCells())
+		self._typeBelief = numpy.full((numGhosts, 5), .2)
+		self._alive = numpy.ones(numGhosts, dtype=bool)
+		self._distances = board.pathDistanceArray()
 		
 	def findMove(self, observations: list[int]) -> None:
 		"""
@@ -24,19 +41,19 @@ class MyAgent(BaseAgent):
 		"""
 		
 		# If you are using a particle filter, you should use the observations to
-		# update your predictions here
+		# update your predictions (in self._positionBelief) here
 		
 		# Find the direction to head that makes its average distance to the
-		# closest ghost as small as possible.
-		bestValue = float('inf')
-		for direction, newLocation in self._pacman.possibleMoves().items():
-			for ghostId in range(self._numGhosts):
-				avgDistance = 0.
-				for loc, p in self.ghostPositionDistribution(ghostId).items():
-					avgDistance += p * self._board.pathDistance(newLocation, loc)
-				if avgDistance < bestValue:
-					bestValue = avgDistance
-					self.setMove(direction)
+		# closest ghost as small as possible.  Entry [i, j] of avgDistance is the
+		# average distance to ghost j after making move i.
+		moves = self._pacman.possibleMoves()
+		directions = list(moves)
+		newCells = [ self._board.cellId(newLocation) for newLocation in moves.values() ]
+		avgDistance = self._distances[newCells] @ self._positionBelief.T
+		avgDistance[:, ~self._alive] = numpy.inf
+		if self._alive.any():
+			bestMove, bestGhost = numpy.unravel_index(numpy.argmin(avgDistance), avgDistance.shape)
+			self.setMove(directions[bestMove])
 		
 	def ghostCaught(self, ghostId: int) -> None:
 		"""
@@ -48,7 +65,7 @@ class MyAgent(BaseAgent):
 		
 		Note that the agent has a reference to Pacman what can be used to access Pacman's current location.
 		"""
-		pass
+		self._alive[ghostId] = False
 		
 	def ghostNotCaught(self, ghostId: int) -> None:
 		"""
@@ -68,7 +85,7 @@ class MyAgent(BaseAgent):
 		"""
 		pass
 		
-	def ghostPositionDistribution(self, ghostId: int) -> dict[Coordinate, float]:
+	def ghostPositionArray(self, ghostId: int) -> numpy.ndarray:
 		"""
 		Return the probability of a ghost being in each possible position on the map.
 		
@@ -78,11 +95,12 @@ class MyAgent(BaseAgent):
 		
 		** Return **
 		
-		A dictionary mapping board locations to the probability that the ghost is in that location.
+		An array with the probability that the ghost is in each location, indexed by the board's cell ids.
+		(`ghostPositionDistribution` turns it into a dictionary.)
 		
-		The sum of the dictionary values must add to 1 and each value cannot be negative.
+		The sum of the array must be 1 and each value cannot be negative.
 		"""
-		return { location : 1/len(self._board.validLocations()) for location in self._board.validLocations()}
+		return self._positionBelief[ghostId].copy()
 		
 	def ghostTypeDistribution(self, ghostId: int) -> dict[str, float]:
 		"""
@@ -99,4 +117,13 @@ class MyAgent(BaseAgent):
 		
 		The sum of the dictionary values must add to 1 and each value cannot be negative.
 		"""
-		return { ghostType : .2 for ghostType in 'RSCBO' }
+		return dict(zip('RSCBO', self._typeBelief[ghostId].tolist()))
+		
+	def mostLikelyGhostType(self, ghostId: int) -> tuple[str, float]:
+		"""Return the most likely type of a ghost and its probability."""
+		typeId = int(numpy.argmax(self._typeBelief[ghostId]))
+		return ('RSCBO'[typeId], float(self._typeBelief[ghostId, typeId]))
+		
+	def ghostTypeProbability(self, ghostId: int, ghostType: str) -> float:
+		"""Return the probability of a ghost having a type."""
+		return float(self._typeBelief[ghostId, 'RSCBO'.index(ghostType)])
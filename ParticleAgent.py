@@ -0,0 +1,124 @@
+from Agent import *
+from ParticleFilter import *
+from Ghost import *
+
+import random
+import numpy
+
+class ParticleAgent(BaseAgent):
+	"""
+	Base class for agents that track the ghosts with particle filters.
+
+	Each ghost is tracked with a `RaoBlackwellisedParticleFilter` whose particles are ghost states
+	without a type (the location, heading and thinking state) and which keeps exact probabilities
+	for the ghost's type.  This class implements all of the agent's methods except `findMove`,
+	which should call `updateBeliefs` with the observations before choosing a move.
+
+	** Member data **
+
+	*`_filters` (list[RaoBlackwellisedParticleFilter | None]): the belief about each ghost, or None once it has been caught
+	"""
+
+	numParticles = 300
+
+	def __init__(self, board: Board, pacman: Pacman, numGhosts: int, timeLimit: float):
+		"""Create a new agent instance."""
+		BaseAgent.__init__(self, board, pacman, numGhosts, timeLimit)
+		startingLocations = [ location for location in board.validLocations() if Board.manhattanDistance(location, board.getPacmanStart()) > 2 ]
+		self._filters = [ self._newFilter(startingLocations) for ghostId in range(numGhosts) ]
+
+	def _newFilter(self, locations: list[Coordinate]) -> RaoBlackwellisedParticleFilter:
+		"""Return a filter with particles spread evenly over the locations, with all ghost types equally likely."""
+
+		particleFilter = RaoBlackwellisedParticleFilter('RSCBO')
+		for i in range(self.numParticles):
+			particleFilter.addParticle(GhostState(alive=True, ghostType='', location=random.choice(locations), heading='', thinking=True))
+		return particleFilter
+
+	def _update(self, ghostId: int, likelihood, resetLocations) -> None:
+		"""
+		Reweight and resample a ghost's particles.
+
+		If no particle is consistent with the evidence, the particles are spread over `resetLocations()` instead.
+		"""
+
+		particleFilter = self._filters[ghostId]
+		particleFilter.reweight(likelihood)
+		if sum(particleFilter.getParticleProbabilties().values()) > 0:
+			particleFilter.resample()
+		else:
+			self._filters[ghostId] = self._newFilter(resetLocations())
+
+	def updateBeliefs(self, observations: list[int]) -> None:
+		"""
+		Update the beliefs about the ghosts with the noisy distances measured from Pacman's location.
+
+		** Parameter **
+
+		*`observations` (list[int]): the observations passed to `findMove`.
+		"""
+
+		location = self._pacman.getState().location
+		for ghostId, observation in enumerate(observations):
+			if self._filters[ghostId] is not None:
+				likelihood = lambda particle: self._board.noisyDistanceProb(observation, Board.manhattanDistance(location, particle.location))
+				resetLocations = lambda: [ cell for cell in self._board.validLocations() if self._board.noisyDistanceProb(observation, Board.manhattanDistance(location, cell)) > 0 ]
+				self._update(ghostId, likelihood, resetLocations)
+
+	def liveGhosts(self) -> list[int]:
+		"""Return the ids of the ghosts that have not been caught."""
+		return [ ghostId for ghostId, particleFilter in enumerate(self._filters) if particleFilter is not None ]
+
+	def sampleGhostStates(self, ghostId: int, count: int) -> list[GhostState]:
+		"""Return `count` ghost states (including their types) drawn at random from the belief about a ghost."""
+
+		samples = self._filters[ghostId].sample(count)
+		typedStates = {}
+		for (particle, ghostType) in set(samples):
+			typedStates[(particle, ghostType)] = GhostState(alive=True, ghostType=ghostType, location=particle.location, heading=particle.heading, thinking=particle.thinking)
+		return [ typedStates[sample] for sample in samples ]
+
+	def ghostStateDistribution(self, ghostId: int) -> dict[GhostState, float]:
+		"""Return the probability of a ghost being in each state (including its type) according to its particles."""
+
+		return { GhostState(alive=True, ghostType=ghostType, location=particle.location, heading=particle.heading, thinking=particle.thinking) : probability
+			for ((particle, ghostType), probability) in self._filters[ghostId].getJointProbabilities().items() }
+
+	def ghostCaught(self, ghostId: int) -> None:
+		"""The ghost has been caught, so stop tracking it."""
+		self._filters[ghostId] = None
+
+	def ghostNotCaught(self, ghostId: int) -> None:
+		"""Remove the particles where the ghost would have been caught."""
+
+		if self._filters[ghostId] is not None:
+			location = self._pacman.getState().location
+			self._update(ghostId, lambda particle: 0. if particle.location == location else 1.,
+				lambda: [ cell for cell in self._board.validLocations() if cell != location ])
+
+	def ghostsHaveMoved(self) -> None:
+		"""Move the particles using each of the possible ghost behaviors."""
+
+		location = self._pacman.getState().location
+		for particleFilter in self._filters:
+			if particleFilter is not None:
+				particleFilter.advance(lambda particle, ghostType: possibleGhostMovesOfType(particle, ghostType, location, self._board))
+
+	def ghostPositionArray(self, ghostId: int) -> numpy.ndarray:
+		"""Return the probability of the ghost being at each location (indexed by cell id), according to its particles."""
+
+		if self._filters[ghostId] is None:
+			return numpy.full(self._board.numCells(), 1/self._board.numCells())
+
+		probabilities = self._filters[ghostId].getParticleProbabilties()
+		cellIds = numpy.fromiter((self._board.cellId(particle.location) for particle in probabilities), int, len(probabilities))
+		weights = numpy.fromiter(probabilities.values(), float, len(probabilities))
+		distribution = numpy.bincount(cellIds, weights, self._board.numCells())
+		return distribution / distribution.sum()
+
+	def ghostTypeDistribution(self, ghostId: int) -> dict[str, float]:
+		"""Return the probability of the ghost having each type, according to its particles."""
+
+		if self._filters[ghostId] is None:
+			return { ghostType : .2 for ghostType in 'RSCBO' }
+		return self._filters[ghostId].getHypothesisProbabilities()
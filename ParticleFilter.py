@@ -1,9 +1,21 @@
 from collections import defaultdict
 import random
+import numpy
 import numpy.random
 
 rng = numpy.random.default_rng()
 
+def seed(value) -> None:
+	"""
+	Reseed the random number generator used by particle filters that were not given their own.
+	
+	**Parameters**
+	
+	* `value`: anything accepted by `numpy.random.default_rng`, such as an int or a `numpy.random.SeedSequence`.
+	"""
+	global rng
+	rng = numpy.random.default_rng(value)
+
 class ParticleFilter:
 	"""
 	Manage particle filtering to estimate states in an HMM.
@@ -14,6 +26,8 @@ class ParticleFilter:
 	* `_particleWeight` (dict): a dictionary from a particle to the number of times the 
 		particle is present.  As long as the particle filter does not need reweighting
 		these values will be intergers.
+	* `_rng` (numpy.random.Generator | None): the random number generator for this filter.  If None,
+		the module's generator (see `seed`) is used.
 		
 	The typical workflow of this class is:
 	
@@ -29,10 +43,21 @@ class ParticleFilter:
 	* Repeat starting at step 2 as necessary.
 	"""
 	
-	def __init__(self):
-		"""Initialize the particle filter with no particles."""
+	def __init__(self, rng=None):
+		"""
+		Initialize the particle filter with no particles.
+		
+		**Parameters**
+		
+		* `rng` (numpy.random.Generator): the random number generator to use, for reproducible results.
+		"""
 		self._numParticles = 0
 		self._particleWeight = defaultdict(float)
+		self._rng = rng
+		
+	def _random(self):
+		"""Return the random number generator to use."""
+		return self._rng if self._rng is not None else rng
 		
 	def addParticle(self, particle):
 		"""
@@ -63,7 +88,7 @@ class ParticleFilter:
 		
 		newWeight = defaultdict(float)
 		
-		for (particleId, count) in enumerate(rng.multinomial(self._numParticles, weights)):
+		for (particleId, count) in enumerate(self._random().multinomial(self._numParticles, weights)):
 			newWeight[particles[particleId]] = count
 			
 		self._particleWeight = newWeight
@@ -80,12 +105,12 @@ class ParticleFilter:
 		"""
 		
 		newParticles = defaultdict(float)
+		generator = self._random()
 		for (particle, count) in self._particleWeight.items():
 			count = int(round(count))
 			possibleResults = possibleMoves(particle)
-			for repeat in range(count):
-				result = random.choice(possibleResults)
-				newParticles[result] += 1
+			for resultId in generator.integers(len(possibleResults), size=count):
+				newParticles[possibleResults[resultId]] += 1
 			self._particleWeight = newParticles
 		
 	def reweight(self, likelihood):
@@ -127,4 +152,180 @@ class ParticleFilter:
 			elif prob == maxProb:
 				mostLikely.append(particle)
 				
-		return random.choice(mostLikely)
+		return mostLikely[self._random().integers(len(mostLikely))]
+
+class RaoBlackwellisedParticleFilter(ParticleFilter):
+	"""
+	Particle filter where a fixed, discrete hypothesis about each particle is tracked exactly.
+	
+	The particles only sample the part of the state that changes over time.  The hypothesis
+	(for example, a ghost's behaviour type) never changes, so rather than sampling it each
+	particle carries the exact posterior probability of every hypothesis given the path that
+	the particle has followed.  No particles are wasted on duplicating the same state for
+	different hypotheses.
+	
+	**Member Data**
+	
+	* `_hypotheses` (tuple): the possible values of the hypothesis.
+	* `_hypothesisWeight` (dict): a dictionary from a particle to a numpy array with the
+		probability of each hypothesis (in the order of `_hypotheses`) for that particle.
+		
+	The workflow is the same as for `ParticleFilter`, except that the function passed to
+	`advance` also receives the hypothesis to use for the move.
+	"""
+	
+	def __init__(self, hypotheses, prior=None, rng=None):
+		"""
+		Initialize the particle filter with no particles.
+		
+		**Parameters**
+		
+		* `hypotheses`: the possible values of the hypothesis, e.g. `'RSCBO'`.
+		* `prior`: a list with the prior probability of each hypothesis.  If omitted, the
+			hypotheses are equally likely.
+		* `rng` (numpy.random.Generator): the random number generator to use, for reproducible results.
+		"""
+		ParticleFilter.__init__(self, rng)
+		self._hypotheses = tuple(hypotheses)
+		if prior is None:
+			prior = [ 1. ] * len(self._hypotheses)
+		self._prior = numpy.array(prior, dtype=float)
+		self._prior /= self._prior.sum()
+		self._hypothesisWeight = {}
+		
+	def addParticle(self, particle):
+		"""
+		Add a new particle to the system with the prior hypothesis probabilities.
+		
+		**Parameters**
+		
+		* `particle`: an immutable representation of a single particle.
+		"""
+		self._hypothesisWeight[particle] = self._mergeHypotheses(self._particleWeight.get(particle, 0), self._hypothesisWeight.get(particle), 1, self._prior)
+		ParticleFilter.addParticle(self, particle)
+		
+	@staticmethod
+	def _mergeHypotheses(oldCount, oldHypotheses, newCount, newHypotheses):
+		"""Return the combined hypothesis probabilities when more copies of a particle are added."""
+		
+		if oldCount > 0:
+			return (oldCount * oldHypotheses + newCount * newHypotheses) / (oldCount + newCount)
+		return newHypotheses
+		
+	def resample(self):
+		"""
+		Create a new sample of particles.
+		
+		The hypothesis probabilities of the surviving particles are unchanged.
+		"""
+		ParticleFilter.resample(self)
+		self._particleWeight = defaultdict(float, { particle : count for (particle, count) in self._particleWeight.items() if count > 0 })
+		self._hypothesisWeight = { particle : self._hypothesisWeight[particle] for particle in self._particleWeight }
+		
+	def advance(self, possibleMoves):
+		"""
+		Move each particle using the provided possibleMoves function.
+		
+		**Parameters**
+		
+		* `possibleMoves`: a function that takes a particle and a hypothesis as input and gives a list of
+			possible (equally likely) next states of that particle if that hypothesis is true.
+			
+		Each particle moves according to the mixture of its hypotheses.  Afterwards, the hypothesis
+		probabilities of each result are updated with Bayes' rule using how likely that move was under
+		each hypothesis.
+		
+		Precondition, the particle weights are all integers.  For example, this is called after a resample.
+		"""
+		
+		newParticles = defaultdict(float)
+		newHypotheses = {}
+		generator = self._random()
+		for (particle, count) in self._particleWeight.items():
+			count = int(round(count))
+			if count == 0:
+				continue
+			
+			# Joint probability of each result and each hypothesis
+			joint = {}
+			for (h, hypothesis) in enumerate(self._hypotheses):
+				prior = self._hypothesisWeight[particle][h]
+				if prior == 0.:
+					continue
+				possibleResults = possibleMoves(particle, hypothesis)
+				p = prior / len(possibleResults)
+				for result in possibleResults:
+					if result not in joint:
+						joint[result] = numpy.zeros(len(self._hypotheses))
+					joint[result][h] += p
+					
+			results = list(joint)
+			resultProbabilities = numpy.array([ joint[result].sum() for result in results ])
+			resultProbabilities /= resultProbabilities.sum()
+			for (resultId, copies) in enumerate(generator.multinomial(count, resultProbabilities)):
+				if copies > 0:
+					result = results[resultId]
+					posterior = joint[result] / joint[result].sum()
+					newHypotheses[result] = self._mergeHypotheses(newParticles[result], newHypotheses.get(result), copies, posterior)
+					newParticles[result] += copies
+					
+		self._particleWeight = newParticles
+		self._hypothesisWeight = newHypotheses
+		
+	def getHypothesisProbabilities(self):
+		"""
+		Return a dictionary of the probability of each hypothesis across all particles.
+		"""
+		
+		total = numpy.zeros(len(self._hypotheses))
+		for (particle, weight) in self._particleWeight.items():
+			total += weight * self._hypothesisWeight[particle]
+		s = total.sum()
+		if s > 0:
+			total /= s
+		else:
+			total = self._prior
+		return { hypothesis : float(p) for (hypothesis, p) in zip(self._hypotheses, total) }
+		
+	def getJointProbabilities(self):
+		"""
+		Return a dictionary of the probability of each (particle, hypothesis) pair.
+		"""
+		
+		total = sum(self._particleWeight.values())
+		probabilities = {}
+		for (particle, weight) in self._particleWeight.items():
+			if weight > 0:
+				for (hypothesis, p) in zip(self._hypotheses, self._hypothesisWeight[particle]):
+					if p > 0:
+						probabilities[(particle, hypothesis)] = weight * float(p) / total
+		return probabilities
+		
+	def sample(self, count):
+		"""
+		Draw particles at random from the current distribution, along with a hypothesis for each.
+		
+		**Parameters**
+		
+		* `count` (int): the number of samples to draw.
+		
+		**Return**
+		
+		A list of `count` (particle, hypothesis) pairs in random order.  The hypothesis for each
+		sample is drawn using the hypothesis probabilities of its particle.
+		"""
+		
+		particles = list(self._particleWeight)
+		weights = numpy.array([ self._particleWeight[particle] for particle in particles ], dtype=float)
+		weights /= weights.sum()
+		
+		generator = self._random()
+		samples = []
+		for (particleId, copies) in enumerate(generator.multinomial(count, weights)):
+			if copies > 0:
+				particle = particles[particleId]
+				hypotheses = self._hypothesisWeight[particle]
+				for h in generator.choice(len(self._hypotheses), size=copies, p=hypotheses/hypotheses.sum()):
+					samples.append((particle, self._hypotheses[h]))
+		generator.shuffle(samples)
+		return samples
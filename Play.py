@@ -1,219 +1,294 @@
-from Ghost import *
-from Pacman import *
-from Board import *
-from Agent import *
+from Engine import *
 
-import sys, importlib, argparse, time, random, traceback
+import sys, os, importlib, argparse, time, random, traceback
 
-class Ghostbusters:
+# Verbosity levels for the console output
+verbosityQuiet = 0			# nothing during the game
+verbosityEvents = 1			# the observations, Pacman's moves, the ghosts caught and the score
+verbosityPredictions = 2	# also the agent's predictions (if the information level is at least 1)
+verbosityBoard = 3			# also the board after each turn
+
+class ConsoleObserver(GameObserver):
 	"""
-	Manages a game of ghostbusters.
+	Prints the progress of a game to the console.
+	
+	** Member data **
+	
+	* `_informationLevel` (int): how much information to display during each turn (0 = only observations,
+		1 = also show predictions, 2 = show actual information)
+	* `_verbosity` (int): how much to print (`verbosityQuiet`, `verbosityEvents`, `verbosityPredictions` or `verbosityBoard`)
+	* `_ansi` (bool): if True, the board stays at the top of the terminal and only its changes are
+		redrawn, with the text for the current turn below it
+	* `_boardRenderer` (BoardRenderer | None): draws the board
+	
+	Events that are not printed at the verbosity level are not handled at all, so nothing is
+	formatted and the agent is not asked for predictions that would not be shown.
+	"""
+	
+	_eventVerbosity = { 'turnStarted': verbosityEvents, 'observationsMade': verbosityEvents, 'pacmanMoved': verbosityEvents, 'predictionsRequested': verbosityPredictions,
+		'ghostCaught': verbosityEvents, 'turnEnded': verbosityEvents }
+	
+	def __init__(self, informationLevel: int, verbosity: int = verbosityBoard, ansi: bool = False):
+		self._informationLevel = informationLevel
+		self._verbosity = verbosity
+		self._ansi = ansi and verbosity >= verbosityBoard
+		self._boardRenderer = None
+		
+	def handles(self, event: str) -> bool:
+		if event == 'predictionsRequested' and self._informationLevel < 1:
+			return False
+		if event == 'gameStarted':
+			return self._ansi
+		return event in self._eventVerbosity and self._verbosity >= self._eventVerbosity[event]
+		
+	def gameStarted(self, engine: GhostbustersEngine) -> None:
+		print(self._renderer(engine).renderChanges(*self._stamps(engine)), end='')
+		
+	def turnStarted(self, engine: GhostbustersEngine) -> None:
+		if self._ansi:
+			# Replace the previous turn's text below the board
+			print(f'\x1b[{self._renderer(engine).height() + 2};1H\x1b[J', end='')
+		print(f'Turn {engine.getTurn()}')
+		
+	def observationsMade(self, engine: GhostbustersEngine, observations: list[int]) -> None:
+		print(f'Observed distances {", ".join(str(o) for o in observations)}.')
+		
+	def pacmanMoved(self, engine: GhostbustersEngine, action: str) -> None:
+		print(f'Pacman at {engine.getPacman().getState().location}, moving {action}')
+		
+	def predictionsRequested(self, engine: GhostbustersEngine) -> None:
+		agent = engine.getAgent()
+		fastTypes = agent.overrides('mostLikelyGhostType')
+		fastPositions = agent.overrides('mostLikelyGhostPosition') or agent.overrides('ghostPositionArray')
+		print('Predicted ghost types:')
+		for ghostId, ghost in enumerate(engine.getGhosts()):
+			if ghost.alive:
+				(guess, probability, actual) = self._prediction(agent, fastTypes, 'mostLikelyGhostType', 'ghostTypeProbability', 'ghostTypeDistribution', ghostId, ghost.ghostType)
+				if self._informationLevel >= 2:
+					print(f'\t{guess} ({probability*100:.2f}%), actual {ghost.ghostType} ({actual*100:.2f}%)')
+				else:
+					print(f'\t{guess} ({probability*100:.2f}%)')
+		
+		print('Predicted ghost positions:')
+		for ghostId, ghost in enumerate(engine.getGhosts()):
+			if ghost.alive:
+				(guess, probability, actual) = self._prediction(agent, fastPositions, 'mostLikelyGhostPosition', 'ghostPositionProbability', 'ghostPositionDistribution', ghostId, ghost.location)
+				if self._informationLevel >= 2:
+					print(f'\t{guess} ({probability*100:.2f})%, actual {ghost.location} ({actual*100:.2f}%)')
+				else:
+					print(f'\t{guess} ({probability*100:.2f})%')
+					
+	def _prediction(self, agent: BaseAgent, fast: bool, mostLikely: str, probabilityOf: str, distributionOf: str, ghostId: int, actual) -> tuple:
+		"""
+		Return an agent's guess about a ghost, the probability of the guess and (at information level 2)
+		the probability of the actual value.
+		
+		The agent's `mostLikely` and `probabilityOf` methods are used, so agents that answer them directly
+		never build a distribution.  If they are not `fast` (that is, the agent's answers would each come
+		from the whole distribution anyway), the distribution is built once to answer both questions.
+		"""
+		
+		if self._informationLevel >= 2 and not fast:
+			distribution = getattr(agent, distributionOf)(ghostId)
+			guess = max(distribution, key=distribution.get)
+			return (guess, distribution[guess], distribution.get(actual, 0))
+		(guess, probability) = getattr(agent, mostLikely)(ghostId)
+		return (guess, probability, getattr(agent, probabilityOf)(ghostId, actual) if self._informationLevel >= 2 else None)
+		
+	def ghostCaught(self, engine: GhostbustersEngine, ghostId: int, ranIntoPacman: bool) -> None:
+		if ranIntoPacman:
+			print(f'Ghost {ghostId} ran into Pacman')
+		else:
+			print(f'Ghost {ghostId} caught!')
+			
+	def turnEnded(self, engine: GhostbustersEngine) -> None:
+		print(f'Score is {engine.getScore()}.')
+		print()
+		if self._ansi:
+			print(self._renderer(engine).renderChanges(*self._stamps(engine)), end='', flush=True)
+		elif self._verbosity >= verbosityBoard:
+			print(self.render(engine))
+			print()
+		
+	def render(self, engine: GhostbustersEngine) -> str:
+		"""Represent the current board state as text."""
+		return self._renderer(engine).render(*self._stamps(engine))
+		
+	def _renderer(self, engine: GhostbustersEngine) -> 'BoardRenderer':
+		"""Return the renderer for the game's board, creating it the first time."""
+		if self._boardRenderer is None:
+			self._boardRenderer = BoardRenderer(engine.getBoard())
+		return self._boardRenderer
+		
+	def _stamps(self, engine: GhostbustersEngine) -> tuple[Coordinate, list[Coordinate]]:
+		"""Return Pacman's location and the locations of the ghosts to show."""
+		ghostLocations = [ ghost.location for ghost in engine.getGhosts() if ghost.alive ] if self._informationLevel >= 2 else []
+		return (engine.getPacman().getState().location, ghostLocations)
+		
+class BoardRenderer:
+	"""
+	Draws the board as text.
+	
+	The characters of the empty board (with a newline at the end of each row) are kept in a list.
+	A frame is drawn by stamping Pacman and the ghosts into the list, joining it once and then
+	restoring the stamped cells, so drawing takes time proportional to the number of ghosts plus
+	a single join.
+	
+	** Member data **
+	
+	* `_background` (list[str]): the characters of the empty board
+	* `_cells` (list[str]): the characters of the frame being drawn
+	* `_index` (dict[Coordinate, int]): the position of each valid location in the lists
+	* `_width` (int): the number of characters in each row, including the newline
+	* `_shown` (dict[int, str] | None): the cells that differ from the empty board in the last frame
+		drawn by `renderChanges`, or None before the first frame
+	"""
+	
+	def __init__(self, board: Board):
+		size = board.getSize()
+		valid = set(board.validLocations())
+		self._width = size + 1
+		self._background = []
+		self._index = {}
+		for y in range(size):
+			for x in range(size):
+				location = Coordinate(x, y)
+				if location in valid:
+					self._index[location] = len(self._background)
+					self._background.append(' ')
+				else:
+					self._background.append('W')
+			self._background.append('\n')
+		self._cells = list(self._background)
+		self._shown = None
+		
+	def _stamp(self, pacmanLocation: Coordinate, ghostLocations: list[Coordinate]) -> dict[int, str]:
+		"""Return the cells that differ from the empty board; Pacman is drawn over any ghost."""
+		stamps = { self._index[location] : 'G' for location in ghostLocations }
+		stamps[self._index[pacmanLocation]] = 'P'
+		return stamps
+		
+	def render(self, pacmanLocation: Coordinate, ghostLocations: list[Coordinate]) -> str:
+		"""Return the whole board as text, with a 'P' for Pacman and a 'G' for each ghost location."""
+		
+		stamps = self._stamp(pacmanLocation, ghostLocations)
+		cells = self._cells
+		for (index, character) in stamps.items():
+			cells[index] = character
+		frame = ''.join(cells)
+		for index in stamps:
+			cells[index] = self._background[index]
+		return frame
+		
+	def renderChanges(self, pacmanLocation: Coordinate, ghostLocations: list[Coordinate]) -> str:
+		"""
+		Return ANSI terminal codes that update the board drawn at the top of the terminal.
+		
+		The first call clears the terminal and draws the whole board; later calls only redraw the
+		cells that changed.  The cursor is left where it was.
+		"""
+		
+		stamps = self._stamp(pacmanLocation, ghostLocations)
+		if self._shown is None:
+			self._shown = stamps
+			return '\x1b7\x1b[H\x1b[2J' + self.render(pacmanLocation, ghostLocations) + '\x1b8'
+		
+		background = self._background
+		codes = []
+		for index in self._shown.keys() | stamps.keys():
+			character = stamps.get(index, background[index])
+			if character != self._shown.get(index, background[index]):
+				(row, column) = divmod(index, self._width)
+				codes.append(f'\x1b[{row + 1};{column + 1}H{character}')
+		self._shown = stamps
+		return '\x1b7' + ''.join(codes) + '\x1b8' if codes else ''
+		
+	def height(self) -> int:
+		"""Return the number of rows of the board."""
+		return len(self._background) // self._width
+		
+class PauseObserver(GameObserver):
+	"""
+	Pauses the game so that it can be followed.
+	
+	** Member data **
+	
+	* `_timeDelay` (float): time delay (in seconds) at the end of each turn.  If it is negative, the game waits
+		for the user to hit enter at the end of each turn instead, and if it is -2 or less then also after each
+		step of the turn.
+	"""
+	
+	def __init__(self, timeDelay: float):
+		self._timeDelay = timeDelay
+		
+	def _stepPause(self) -> None:
+		if self._timeDelay <= -2:
+			input('Hit enter to continue')
+			
+	def observationsMade(self, engine: GhostbustersEngine, observations: list[int]) -> None:
+		self._stepPause()
+		
+	def pacmanMoved(self, engine: GhostbustersEngine, action: str) -> None:
+		self._stepPause()
+		
+	def predictionsRequested(self, engine: GhostbustersEngine) -> None:
+		self._stepPause()
+		
+	def ghostsMoved(self, engine: GhostbustersEngine) -> None:
+		self._stepPause()
+		
+	def turnEnded(self, engine: GhostbustersEngine) -> None:
+		if self._timeDelay >= 0:
+			time.sleep(self._timeDelay)
+		else:
+			input('Hit enter to continue')
+
+class Ghostbusters(GhostbustersEngine):
+	"""
+	Manages a game of ghostbusters with output to the console and (optionally) graphics.
 	
 	** Member data **
 	
-	* `_agent` (Agent): the agent instance that makes Pacmans decision
-	* `_board` (Board): the game board
-	* `_pacman` (Pacman): stores Pacman's current state
-	* `_ghosts` (list[GhostState]): the state of each ghost
 	* `_informationLevel` (int): how much information to display during each turn (0 = only observations,
 		1 = also show predictions, 2 = show actual information)
 	* `_timeDelay` (float): time delay (in seconds) at the end of each turn
 	* `_graphics`: graphics instance for rendering game or None
+	* `_console` (ConsoleObserver): prints the game to the console
+	
+	See `GhostbustersEngine` for the rest of the member data.
 	"""
 	
-	_agent: BaseAgent
-	_board: Board
-	_pacman: Pacman
-	_ghosts: list[GhostState]
 	_informationLevel: int
 	_timeDelay: float
 	
-	def __init__(self, pacmanAgentClass, numGhosts: int, timeLimit: float, informationLevel, graphicsSize: int, timeDelay: float):
+	def __init__(self, pacmanAgentClass, numGhosts: int, timeLimit: float, informationLevel, graphicsSize: int, timeDelay: float, agentProcess: bool = False, seed: int | None = None, verbosity: int = verbosityBoard, ansi: bool = False):
 		"""
 		Initialize a new game of Ghostbusters
+		
+		If `agentProcess` is True, the agent runs in a separate process and is stopped if it
+		does not finish its move within the time limit.  If `seed` is given the game can be
+		reproduced by playing again with the same seed.  `verbosity` sets how much is printed
+		to the console and `ansi` keeps the board in place at the top of the terminal.
 		"""
 		
-		self._board = Board()
-		self._pacman = Pacman(self._board)
-		self._agent = pacmanAgentClass(self._board, self._pacman, numGhosts, timeLimit)
-		self._numGhosts = numGhosts
-		self._ghosts = [ randomGhost(self._board) for ghostId in range(numGhosts) ]
+		GhostbustersEngine.__init__(self, pacmanAgentClass, numGhosts, timeLimit, agentProcess, seed)
 		self._informationLevel = informationLevel
 		self._timeDelay = timeDelay
 		
+		self._console = ConsoleObserver(informationLevel, verbosity, ansi)
+		self.addObserver(self._console)
+		
 		if graphicsSize > 0:
 			self._graphics = GhostbusterGraphics(self._board, self._numGhosts, graphicsSize)
+			self.addObserver(GraphicsObserver(self._graphics, informationLevel, timeDelay <= -2))
 		else:
 			self._graphics = None
-
-		
-	def play(self) -> int:
-		"""
-		Play a game of pacman.
-		
-		** Return value **
-		
-		The score of the game
-		"""
-		
-		# Play the games
-		turn = 0
-		gameOver = False
-		score = 0
-
-		if self._graphics:
-			self._graphics.movePacman(self._pacman.getState().location)
-			if self._informationLevel >= 2:
-				for ghostId, ghost in enumerate(self._ghosts):
-					self._graphics.moveGhost(ghostId, ghost.location)
-					self._graphics.identifyGhostType(ghostId, ghost.ghostType)
-					
-		while turn < 1000 and not gameOver:
-			turn += 1
-			print(f'Turn {turn}')
-			
-			# Get noisy distance measurements, update predictions and choose move
-			observations = []
-			for ghost in self._ghosts:
-				if ghost.alive:
-					observations.append(self._board.noisyDistance(self._pacman.getState().location, ghost.location))
-				else:
-					observations.append(0)
-					
-			print(f'Observed distances {", ".join(str(o) for o in observations)}.')
-			if self._graphics:
-				self._graphics.drawObservations((self._pacman.getState().location.x, self._pacman.getState().location.y), observations)
-			
-			if self._timeDelay <= -2:
-				input('Hit enter to continue')
 			
-			# Move Pacman and check if any ghosts are caught
-			self._agent._startTime = time.time()
-			self._agent.findMove(observations)
-			action = self._agent.getMove()
-			
-			self._pacman.move(action)
-			
-			print(f'Pacman at {self._pacman.getState().location}, moving {action}')
-			
-			if self._graphics:
-				self._graphics.movePacman(self._pacman.getState().location)
-			
-			if self._timeDelay <= -2:
-				input('Hit enter to continue')
-			
-			if self._informationLevel >= 1:
-				print('Predicted ghost types:')
-				for ghostId, ghost in enumerate(self._ghosts):
-					if ghost.alive:
-						distribution = self._agent.ghostTypeDistribution(ghostId)
-						guess = max(distribution, key=distribution.get)
-						if self._informationLevel >= 2:
-							print(f'\t{guess} ({distribution[guess]*100:.2f}%), actual {ghost.ghostType} ({distribution.get(ghost.ghostType,0)*100:.2f}%)')
-						else:
-							print(f'\t{guess} ({distribution[guess]*100:.2f}%)')
-						
-						if self._graphics:
-							self._graphics.updateGhostType(ghostId, distribution)
-			
-			if self._informationLevel >= 1:
-				print('Predicted ghost positions:')
-				allDistributions = []
-				for ghostId, ghost in enumerate(self._ghosts):
-					if ghost.alive:
-						distribution = self._agent.ghostPositionDistribution(ghostId)
-						allDistributions.append(distribution)
-						guess = max(distribution, key=distribution.get)
-						if self._informationLevel >= 2:
-							print(f'\t{guess} ({distribution[guess]*100:.2f})%, actual {ghost.location} ({distribution.get(ghost.location,0)*100:.2f}%)')
-						else:
-							print(f'\t{guess} ({distribution[guess]*100:.2f})%')
-					else:
-						allDistributions.append(None)
-				
-				if self._graphics:
-					self._graphics.updateGhostPositions(allDistributions)
-			
-			
-			if self._timeDelay <= -2:
-				input('Hit enter to continue')
-			
-			for ghostId, ghost in enumerate(self._ghosts):
-				if ghost.alive and ghost.location == self._pacman.getState().location:
-					self._ghosts[ghostId] = GhostState(alive=False, ghostType='', location=Coordinate(0,0), heading='', thinking=False)
-					score += 1000
-					self._agent.ghostCaught(ghostId)
-					
-					if self._graphics:
-						self._graphics.moveGhost(ghostId, self._ghosts[ghostId].location)
-					
-					print(f'Ghost {ghostId} caught!')
-				else:
-					self._agent.ghostNotCaught(ghostId)
-			
-			# Move ghosts and see if any run into Pacman
-			self._ghosts = [ moveGhost(ghost, self._pacman.getState().location, self._board) for ghost in self._ghosts ]
-			self._agent.ghostsHaveMoved()
-			
-			if self._informationLevel >= 2 and self._graphics:
-				for ghostId, ghost in enumerate(self._ghosts):
-					self._graphics.moveGhost(ghostId, ghost.location)
-			
-			for ghostId, ghost in enumerate(self._ghosts):
-				if ghost.alive and ghost.location == self._pacman.getState().location:
-					self._ghosts[ghostId] = GhostState(alive=False, ghostType='', location=Coordinate(0,0), heading='', thinking=False)
-					score += 1000
-					self._agent.ghostCaught(ghostId)
-					if self._graphics:
-						self._graphics.moveGhost(ghostId, self._ghosts[ghostId].location)
-					print(f'Ghost {ghostId} ran into Pacman')
-				else:
-					self._agent.ghostNotCaught(ghostId)
-					
-			if self._timeDelay <= -2:
-				input('Hit enter to continue')
-			
-			# Update scores
-			gameOver = True
-			for ghost in self._ghosts:
-				if ghost.alive:
-					score -= 1
-					gameOver = False
-					
-			print(f'Score is {score}.')
-			print()
-			print(self)
-			print()
-			
-			if self._graphics:
-				self._graphics.updateScoreAndTurn(score, turn)
-				
-			if self._timeDelay >= 0:
-				time.sleep(self._timeDelay)
-			else:
-				input('Hit enter to continue')
-		
-		if self._graphics:
-			self._graphics.movePacman(self._pacman.getState().location)
-		
-		return score
+		self.addObserver(PauseObserver(timeDelay))
 					
 	def __str__(self):
 		"""Represent the current board state as text."""
-		
-		s = ''
-		for y in range(self._board.getSize()):
-			for x, entry in enumerate(self._board._map[y]):
-				if entry == 'W':
-					s += 'W'
-				elif self._pacman.getState().location == Coordinate(x,y):
-					s += 'P'
-				elif Coordinate(x,y) in [ g.location for g in self._ghosts if g.alive ] and self._informationLevel >= 2:
-					s += 'G'
-				else:
-					s += ' '
-			s += '\n'
-		return s
+		return self._console.render(self)
 
 if __name__ == '__main__':
 	parser = argparse.ArgumentParser(description ='Play Ghostbusters')
@@ -223,6 +298,19 @@ if __name__ == '__main__':
 	parser.add_argument('information_level', type=int, help="0=only show observations, 1 also show predictions and 2 show everything")
 	parser.add_argument('-g', type=int, help="size of graphics window")
 	parser.add_argument('-t', type=float, help="time delay")
+	parser.add_argument('-p', action='store_true', help="run the agent in a separate process with a hard time limit")
+	parser.add_argument('-s', '--seed', type=int, help="seed for the random numbers, to reproduce a game")
+	parser.add_argument('-v', '--verbosity', type=int, choices=[verbosityQuiet, verbosityEvents, verbosityPredictions, verbosityBoard], default=verbosityBoard, help="0=print nothing during the game, 1=observations, moves and catches, 2=also predictions, 3=also the board")
+	parser.add_argument('-q', '--quiet', action='store_const', dest='verbosity', const=verbosityQuiet, help="only print the final score")
+	parser.add_argument('--ansi', action='store_true', help="keep the board at the top of the terminal, redrawing only what changes")
+	parser.add_argument('--trace', type=str, help="file (.npz) to record the game to")
+	parser.add_argument('-b', '--budget', action='store_true', help="report how much of its time limit the agent used")
+	parser.add_argument('--timings', type=str, help="file (.json or .csv) to write the time spent in each phase of each turn to")
+	parser.add_argument('--profile', type=str, help="profile the game, writing collapsed stacks (or pstats statistics with --profiler cprofile) to this file")
+	parser.add_argument('--profiler', choices=['sampling', 'cprofile'], default='sampling', help="profiler to use with --profile")
+	parser.add_argument('--gif', type=str, help="draw the game without a window into this animated GIF")
+	parser.add_argument('--frames', type=str, help="draw the game without a window as a PNG for each turn in this directory")
+	parser.add_argument('--scale', type=int, default=8, help="pixels per board square for --gif and --frames")
 	args = parser.parse_args()
 
 	try:
@@ -245,5 +333,43 @@ if __name__ == '__main__':
 	else:
 		timeDelay = 0.
 		
-	game = Ghostbusters(agentModule.MyAgent, args.num_ghosts, args.time_limit, args.information_level, graphicsSize, timeDelay)
-	game.play()
+	game = Ghostbusters(agentModule.MyAgent, args.num_ghosts, args.time_limit, args.information_level, graphicsSize, timeDelay, args.p, args.seed, args.verbosity, args.ansi)
+	if args.trace:
+		from Trace import TraceRecorder, saveTraces
+		recorder = TraceRecorder(args.agent.split('.')[0])
+		game.addObserver(recorder)
+	if args.timings:
+		from Timing import PhaseTimer, summarizePhases, printPhaseSummary, writeTimings
+		timer = PhaseTimer()
+		game.setTimer(timer)
+	if args.gif or args.frames:
+		from Display import GraphicsObserver
+		from RasterGraphics import RasterGraphics
+		if args.frames:
+			os.makedirs(args.frames, exist_ok=True)
+		raster = RasterGraphics(game.getBoard(), args.num_ghosts, args.scale, os.path.join(args.frames, 'turn{:04d}.png') if args.frames else None, args.gif)
+		game.addObserver(GraphicsObserver(raster, args.information_level))
+	if args.profile:
+		from Profiling import profileCall
+		profileCall(game.play, args.profile, args.profiler)
+	else:
+		game.play()
+	if args.trace:
+		saveTraces(args.trace, [ recorder.trace() ])
+	if args.gif or args.frames:
+		raster.close()
+	if args.timings:
+		summary = summarizePhases(timer.turns())
+		printPhaseSummary(summary)
+		writeTimings(args.timings, [ { 'turn': turn + 1, **phases } for (turn, phases) in enumerate(timer.turns()) ], { 'game': summary })
+	
+	if args.verbosity == verbosityQuiet:
+		print(f'Final score {game.getScore()}')
+
+	if args.budget:
+		printBudgetSummary(summarizeBudget(game.getAgent().budgetReport()))
+
+	if args.p and game.getAgent().failures():
+		print('The agent was stopped early:')
+		for failure in game.getAgent().failures():
+			print(f'\t{failure}')
@@ -0,0 +1,182 @@
+"""
+Find where the time goes in a game or tournament.
+
+Two profilers are available, and both summarize the time spent in each module of the project (Board,
+Ghost, ParticleFilter, Agent, the agent modules, Graphics, cs1graphics, ...), with NumPy, the rest of
+the standard library and built in functions grouped separately:
+
+* `SamplingProfiler` looks at the stack of the game's thread every millisecond or so.  It has little
+	overhead, so the proportions are realistic, and it writes the samples as collapsed stacks (one
+	line per distinct stack, `frame;frame;frame count`) that flame graph tools such as flamegraph.pl
+	and speedscope read directly.
+* `cProfile` counts every call exactly but slows down code that makes many small calls.  Its
+	statistics are written in the `pstats` format.
+
+`profileCall` runs a function under either profiler and is used by the `--profile` options of Play.py
+and Tournament.py:
+
+	python Play.py MCTSAgent 4 0.1 0 --profile game.collapsed
+	python Play.py MCTSAgent 4 0.1 0 --profile game.prof --profiler cprofile
+"""
+
+import collections, cProfile, os, pstats, sys, threading, time
+
+_projectDirectory = os.path.dirname(os.path.abspath(__file__))
+
+def moduleName(filename: str) -> str:
+	"""Return the name used to group the time spent in code from a file."""
+
+	if filename.startswith('<') or filename == '~':
+		return 'builtins'
+	path = os.path.abspath(filename)
+	if os.path.dirname(path) == _projectDirectory:
+		return os.path.splitext(os.path.basename(path))[0]
+	if f'{os.sep}numpy{os.sep}' in path:
+		return 'numpy'
+	return 'stdlib'
+
+class SamplingProfiler:
+	"""
+	Profiles a thread by sampling its stack at regular intervals.
+
+	** Member data **
+
+	* `_interval` (float): the seconds between samples
+	* `_threadId` (int): the identifier of the thread being profiled
+	* `_stacks` (collections.Counter): the number of samples of each stack, as a tuple of frame names from the outermost
+	"""
+
+	def __init__(self, interval: float = .001, thread: threading.Thread | None = None):
+		"""Create a profiler for a thread (by default the one that creates the profiler)."""
+		self._interval = interval
+		self._threadId = (thread or threading.current_thread()).ident
+		self._stacks = collections.Counter()
+		self._modules = {}
+		self._running = False
+		self._sampler = None
+
+	def start(self) -> None:
+		"""Start sampling in a background thread."""
+
+		# Let the sampling thread run as often as it wants to take samples
+		self._switchInterval = sys.getswitchinterval()
+		sys.setswitchinterval(min(self._switchInterval, self._interval / 2))
+		self._running = True
+		self._sampler = threading.Thread(target=self._sample, daemon=True)
+		self._sampler.start()
+
+	def stop(self) -> None:
+		"""Stop sampling."""
+
+		self._running = False
+		self._sampler.join()
+		sys.setswitchinterval(self._switchInterval)
+
+	def __enter__(self) -> 'SamplingProfiler':
+		self.start()
+		return self
+
+	def __exit__(self, *exception) -> None:
+		self.stop()
+
+	def _frameName(self, frame) -> tuple[str, str]:
+		"""Return the module and name of the function running in a frame."""
+
+		code = frame.f_code
+		module = self._modules.get(code.co_filename)
+		if module is None:
+			module = self._modules[code.co_filename] = moduleName(code.co_filename)
+		return (module, f'{module}.{getattr(code, "co_qualname", code.co_name)}')
+
+	def _sample(self) -> None:
+		"""Record the stack of the profiled thread until stopped."""
+
+		while self._running:
+			frame = sys._current_frames().get(self._threadId)
+			stack = []
+			while frame is not None:
+				stack.append(self._frameName(frame))
+				frame = frame.f_back
+			if stack:
+				self._stacks[tuple(reversed(stack))] += 1
+			time.sleep(self._interval)
+
+	def numSamples(self) -> int:
+		return sum(self._stacks.values())
+
+	def writeCollapsed(self, path: str) -> None:
+		"""Write the samples as collapsed stacks for flame graph tools."""
+
+		with open(path, 'w') as f:
+			for (stack, count) in self._stacks.most_common():
+				f.write(';'.join(name for (module, name) in stack) + f' {count}\n')
+
+	def moduleSummary(self) -> list[tuple[str, float, float]]:
+		"""
+		Return the (module, self fraction, total fraction) of the samples in each module, most self time first.
+
+		Self time is spent in the module's own code and total time also includes the functions it calls.
+		"""
+
+		total = self.numSamples()
+		selfCount = collections.Counter()
+		totalCount = collections.Counter()
+		for (stack, count) in self._stacks.items():
+			selfCount[stack[-1][0]] += count
+			for module in set(module for (module, name) in stack):
+				totalCount[module] += count
+		return [ (module, selfCount[module] / total, totalCount[module] / total) for module in sorted(totalCount, key=lambda module: (-selfCount[module], -totalCount[module])) ]
+
+def cProfileModuleSummary(stats: pstats.Stats) -> list[tuple[str, float, int]]:
+	"""Return the (module, self seconds, number of calls) of each module in cProfile statistics, most time first."""
+
+	seconds = collections.Counter()
+	calls = collections.Counter()
+	for ((filename, line, function), (primitiveCalls, numCalls, selfTime, totalTime, callers)) in stats.stats.items():
+		module = moduleName(filename)
+		seconds[module] += selfTime
+		calls[module] += numCalls
+	return [ (module, seconds[module], calls[module]) for module in sorted(seconds, key=seconds.get, reverse=True) ]
+
+def printModuleSummary(profiler) -> None:
+	"""Print the per-module summary of a `SamplingProfiler` or `cProfile.Profile`."""
+
+	if isinstance(profiler, SamplingProfiler):
+		print(f'Time by module ({profiler.numSamples()} samples)')
+		print(f'{"Module":20} {"self":>7} {"total":>7}')
+		for (module, selfFraction, totalFraction) in profiler.moduleSummary():
+			print(f'{module:20} {selfFraction*100:6.1f}% {totalFraction*100:6.1f}%')
+	else:
+		summary = cProfileModuleSummary(pstats.Stats(profiler))
+		total = sum(seconds for (module, seconds, calls) in summary)
+		print(f'Time by module ({total:.3f} s profiled)')
+		print(f'{"Module":20} {"self s":>9} {"self":>7} {"calls":>11}')
+		for (module, seconds, calls) in summary:
+			print(f'{module:20} {seconds:9.3f} {seconds / total * 100 if total > 0 else 0:6.1f}% {calls:11}')
+
+def profileCall(function, path: str, profiler: str = 'sampling'):
+	"""
+	Call a function under a profiler, print the per-module summary and save the profile.
+
+	** Parameters **
+
+	* `path` (str): the file for the collapsed stacks (sampling) or the `pstats` statistics (cprofile)
+	* `profiler` (str): 'sampling' or 'cprofile'
+
+	** Return value **
+
+	The result of the function
+	"""
+
+	if profiler == 'cprofile':
+		profile = cProfile.Profile()
+		result = profile.runcall(function)
+		profile.dump_stats(path)
+	elif profiler == 'sampling':
+		with SamplingProfiler() as profile:
+			result = function()
+		profile.writeCollapsed(path)
+	else:
+		raise ValueError(f'Unknown profiler {profiler}')
+	printModuleSummary(profile)
+	return result
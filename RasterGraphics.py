@@ -0,0 +1,390 @@
+"""
+Draw games of Ghostbusters into images without a window.
+
+`RasterGraphics` has the same methods as `GhostbusterGraphics`, so a `GraphicsObserver` can drive
+it, but it paints each frame into a NumPy RGB array instead of a Tk canvas: the board (coloured by
+the agent's beliefs), Pacman, the ghosts, the observation diamonds, the predicted ghost types and
+the score.  Each frame (drawn by `refresh`, once per turn) can be written as a PNG and all of the
+frames can be saved as an animated GIF.  Nothing here imports cs1graphics, so no display or Tkinter
+is needed, and both encoders are written in Python with NumPy and zlib, so nothing beyond NumPy
+needs to be installed:
+
+	python Play.py MyAgent 3 0.05 1 -q --gif game.gif
+	python Play.py MyAgent 3 0.05 1 -q --frames frames
+
+The PNG frames can be joined into a video with a tool such as ffmpeg.
+"""
+
+from Board import *
+from Display import ghostBaseColors, blendedColors, intensityPower
+
+import functools, struct, zlib
+import numpy
+
+tan = (210, 180, 140)
+black = (0, 0, 0)
+yellow = (255, 255, 0)
+white = (255, 255, 255)
+
+# A 3x5 pixel font for the characters used in the side panel
+_font = {
+	'0': ('###', '#.#', '#.#', '#.#', '###'),
+	'1': ('.#.', '##.', '.#.', '.#.', '###'),
+	'2': ('###', '..#', '###', '#..', '###'),
+	'3': ('###', '..#', '.##', '..#', '###'),
+	'4': ('#.#', '#.#', '###', '..#', '..#'),
+	'5': ('###', '#..', '###', '..#', '###'),
+	'6': ('###', '#..', '###', '#.#', '###'),
+	'7': ('###', '..#', '..#', '.#.', '.#.'),
+	'8': ('###', '#.#', '###', '#.#', '###'),
+	'9': ('###', '#.#', '###', '..#', '###'),
+	'-': ('...', '...', '###', '...', '...'),
+	':': ('...', '.#.', '...', '.#.', '...'),
+	' ': ('...', '...', '...', '...', '...'),
+	'B': ('##.', '#.#', '##.', '#.#', '##.'),
+	'C': ('###', '#..', '#..', '#..', '###'),
+	'E': ('###', '#..', '##.', '#..', '###'),
+	'N': ('##.', '#.#', '#.#', '#.#', '#.#'),
+	'O': ('###', '#.#', '#.#', '#.#', '###'),
+	'R': ('##.', '#.#', '##.', '#.#', '#.#'),
+	'S': ('###', '#..', '###', '..#', '###'),
+	'T': ('###', '.#.', '.#.', '.#.', '.#.'),
+	'U': ('#.#', '#.#', '#.#', '#.#', '###'),
+}
+
+@functools.lru_cache
+def _disk(radius: float) -> tuple[numpy.ndarray, int]:
+	"""Return the mask of the pixels within `radius` of the centre of a square and the offset of its corner from the centre."""
+
+	half = int(numpy.ceil(radius)) + 1
+	offsets = numpy.arange(-half, half) + .5
+	return (offsets[:, None]**2 + offsets[None, :]**2 <= radius**2, half)
+
+class RasterGraphics:
+	"""
+	Draws a game of Ghostbusters into RGB images.
+
+	** Member data **
+
+	* `_scale` (int): the width of a board square in pixels
+	* `_background` (numpy.ndarray): the parts of the image that never change
+	* `_image` (numpy.ndarray): the last frame drawn, of shape (height, width, 3)
+	* `_cellColors` (numpy.ndarray): the colour of each valid location, indexed by cell id
+	* `_typeColors` (numpy.ndarray): the colour of the predicted types of each ghost, of shape (ghosts, 5, 3)
+	* `_pacman`, `_ghosts` (tuple[float, float] | None): the pixel centres of Pacman and each ghost, or None if not shown
+	* `_diamonds` (list[tuple[float, float, float] | None]): the centre and radius of each ghost's observation diamond
+	* `_framePath` (str | None): a format string with the turn for writing each frame as a PNG
+	* `_gif` (GifWriter | None): the animated GIF that each frame is added to
+	"""
+
+	def __init__(self, board: Board, numGhosts: int, scale: int = 8, framePath: str | None = None, gifPath: str | None = None, gifDelay: float = .1):
+		self._board = board
+		self._scale = scale
+		self._numGhosts = numGhosts
+		self._ghostBaseColors = ghostBaseColors(numGhosts)
+		size = board.getSize()
+		(self._width, self._height) = ((size + 7) * scale, size * scale)
+
+		self._cellIds = numpy.array([ (location.y, location.x) for location in board.validLocations() ])
+		self._cellColors = numpy.zeros((board.numCells(), 3), dtype=numpy.uint8)
+		self._typeColors = numpy.zeros((numGhosts, 5, 3), dtype=numpy.uint8)
+		self._identified = [ None ] * numGhosts
+		self._pacman = None
+		self._ghosts = [ None ] * numGhosts
+		self._caughtGhosts = []
+		self._diamonds = [ None ] * numGhosts
+		(self._score, self._turn) = (0, 1)
+
+		# The pixel centres, for drawing the diamonds
+		(self._x, self._y) = (numpy.arange(self._width) + .5, numpy.arange(self._height) + .5)
+
+		# Large enough to read and small enough for a score such as -1234 to fit in the panel
+		textScale = max(1, scale // 8)
+		self._glyphs = { character : numpy.array([ [ pixel == '#' for pixel in row ] for row in glyph ]).repeat(textScale, axis=0).repeat(textScale, axis=1)
+			for (character, glyph) in _font.items() }
+		self._walls = numpy.array([ [ entry == 'W' for entry in row ] for row in board._map ])
+		self._background = numpy.empty((self._height, self._width, 3), dtype=numpy.uint8)
+		self._background[:] = tan
+		for (j, ghostType) in enumerate('RSCBO'):
+			self._text(self._background, ghostType, self._panelCentre(2 + j), 5 * scale, centred=True)
+		for ghostId in range(numGhosts):
+			self._stamp(self._background, self._panelCentre(.5), (6 + ghostId) * scale, .4 * scale, self._ghostBaseColors[ghostId])
+
+		self._framePath = framePath
+		self._gif = GifWriter(gifPath, self._width, self._height, gifDelay, [ tan, *self._ghostBaseColors ]) if gifPath else None
+		self._image = None
+		self.refresh()
+
+	def _panelCentre(self, column: float) -> float:
+		"""Return the x pixel of the centre of a column of the side panel."""
+		return (self._board.getSize() + column) * self._scale
+
+	def _squareCentre(self, location: Coordinate) -> tuple[float, float]:
+		return ((location.x + .5) * self._scale, (location.y + .5) * self._scale)
+
+	def _stamp(self, image: numpy.ndarray, x: float, y: float, radius: float, color) -> None:
+		"""Fill a circle, clipped to the image."""
+
+		(mask, half) = _disk(radius)
+		(left, top) = (int(round(x)) - half, int(round(y)) - half)
+		(x0, y0) = (max(left, 0), max(top, 0))
+		(x1, y1) = (min(left + mask.shape[1], image.shape[1]), min(top + mask.shape[0], image.shape[0]))
+		if x0 < x1 and y0 < y1:
+			image[y0:y1, x0:x1][mask[y0 - top:y1 - top, x0 - left:x1 - left]] = color
+
+	def _text(self, image: numpy.ndarray, text: str, x: float, y: float, centred: bool = False) -> None:
+		"""Write text in the pixel font, starting at x (or centred on it) and centred vertically on y."""
+
+		(height, k) = (self._glyphs[' '].shape[0], self._glyphs[' '].shape[1] // 3)
+		width = (4 * len(text) - 1) * k
+		left = int(round(x - width / 2 if centred else x))
+		top = int(round(y - height / 2))
+		for (i, character) in enumerate(text.upper()):
+			glyph = self._glyphs.get(character, self._glyphs[' '])
+			(x0, y0) = (left + 4 * i * k, top)
+			region = image[y0:y0 + glyph.shape[0], x0:x0 + glyph.shape[1]]
+			region[glyph[:region.shape[0], :region.shape[1]]] = black
+
+	def movePacman(self, location: Coordinate) -> None:
+		self._pacman = self._squareCentre(location)
+
+	def moveGhost(self, ghostId: int, location: Coordinate) -> None:
+		if ghostId not in self._caughtGhosts:
+			if location == Coordinate(0,0):
+				self._ghosts[ghostId] = ((len(self._caughtGhosts) + .5) * self._scale, (self._board.getSize() - .5) * self._scale)
+				self._caughtGhosts.append(ghostId)
+			else:
+				self._ghosts[ghostId] = self._squareCentre(location)
+
+	def drawObservations(self, pacmanLocation: tuple[int, int], observations: list[int]) -> None:
+		for (ghostId, noisyDistance) in enumerate(observations):
+			if noisyDistance > 0:
+				r = noisyDistance + ghostId / len(observations)
+				self._diamonds[ghostId] = ((pacmanLocation[0] + .5) * self._scale, (pacmanLocation[1] + .5) * self._scale, r * self._scale)
+			else:
+				self._diamonds[ghostId] = None
+
+	def updateScoreAndTurn(self, score: int, turn: int) -> None:
+		(self._score, self._turn) = (score, turn)
+
+	def identifyGhostType(self, ghostId: int, ghostType: str) -> None:
+		self._identified[ghostId] = 'RSCBO'.index(ghostType)
+
+	def updateGhostType(self, ghostId: int, probabilities: dict[str, float]) -> None:
+		intensities = numpy.power([ probabilities[t] for t in 'RSCBO' ], intensityPower)
+		self._typeColors[ghostId] = (intensities[:, None] * self._ghostBaseColors[ghostId]).astype(int)
+
+	def updateGhostPositions(self, probabilityArray: list[numpy.ndarray | None]) -> None:
+		"""Colour the squares by each ghost's probabilities (an array indexed by cell id, or None if caught)."""
+		self._cellColors = blendedColors(probabilityArray, self._ghostBaseColors, self._board.numCells()).astype(numpy.uint8)
+
+	def refresh(self) -> None:
+		"""Draw a frame, writing it as a PNG and adding it to the GIF if requested."""
+
+		scale = self._scale
+		image = self._background.copy()
+
+		# The board, drawn one pixel per square and then enlarged
+		squares = numpy.empty(self._walls.shape + (3,), dtype=numpy.uint8)
+		squares[self._walls] = tan
+		squares[~self._walls] = black
+		squares[self._cellIds[:, 0], self._cellIds[:, 1]] = self._cellColors
+		image[:, :self._height] = squares.repeat(scale, axis=0).repeat(scale, axis=1)
+
+		if self._pacman is not None:
+			self._stamp(image, *self._pacman, .4 * scale, yellow)
+		# The text starts further left than in GhostbusterGraphics so that long scores fit in the panel
+		self._text(image, f'Score: {self._score}', self._panelCentre(.5), scale)
+		self._text(image, f'Turn: {self._turn}', self._panelCentre(.5), 3 * scale)
+		for ghostId in range(self._numGhosts):
+			y = (6 + ghostId) * scale
+			for j in range(5):
+				if self._identified[ghostId] == j:
+					# A white border, as wide as GhostbusterGraphics draws it
+					self._stamp(image, self._panelCentre(2 + j), y, .45 * scale, white)
+					self._stamp(image, self._panelCentre(2 + j), y, .35 * scale, self._typeColors[ghostId, j])
+				else:
+					self._stamp(image, self._panelCentre(2 + j), y, .4 * scale, self._typeColors[ghostId, j])
+		for (ghostId, ghost) in enumerate(self._ghosts):
+			if ghost is not None:
+				self._stamp(image, *ghost, .3 * scale, self._ghostBaseColors[ghostId])
+		halfWidth = max(.5, .025 * scale)
+		for (ghostId, diamond) in enumerate(self._diamonds):
+			if diamond is not None:
+				(x, y, r) = diamond
+				(x0, x1) = (max(0, int(x - r - 1)), min(self._width, int(x + r + 2)))
+				(y0, y1) = (max(0, int(y - r - 1)), min(self._height, int(y + r + 2)))
+				outline = numpy.abs(numpy.abs(self._x[None, x0:x1] - x) + numpy.abs(self._y[y0:y1, None] - y) - r) <= halfWidth
+				image[y0:y1, x0:x1][outline] = self._ghostBaseColors[ghostId]
+
+		self._image = image
+		if self._framePath is not None:
+			writePng(self._framePath.format(self._turn), image)
+		if self._gif is not None:
+			self._gif.addFrame(image)
+
+	def image(self) -> numpy.ndarray:
+		"""Return the last frame drawn."""
+		return self._image
+
+	def close(self) -> None:
+		"""Finish the GIF (if there is one)."""
+		if self._gif is not None:
+			self._gif.close()
+			self._gif = None
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+	"""Return a PNG chunk."""
+	return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+def writePng(path: str, image: numpy.ndarray, level: int = 6) -> None:
+	"""Write an RGB image (a uint8 array of shape (height, width, 3)) as a PNG file."""
+
+	(height, width) = image.shape[:2]
+	rows = numpy.empty((height, 1 + 3 * width), dtype=numpy.uint8)
+	rows[:, 0] = 0		# no filter
+	rows[:, 1:] = image.reshape(height, 3 * width)
+	with open(path, 'wb') as f:
+		f.write(b'\x89PNG\r\n\x1a\n')
+		f.write(_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+		f.write(_chunk(b'IDAT', zlib.compress(rows.tobytes(), level)))
+		f.write(_chunk(b'IEND', b''))
+
+def gifPalette(extraColors: list[tuple[int, int, int]] = []) -> numpy.ndarray:
+	"""
+	Return a 256 colour palette: the 216 colours of a 6x6x6 colour cube followed by `extraColors`
+	(at most 40 colours that are reproduced exactly), padded with black.
+	"""
+
+	levels = numpy.arange(6) * 51
+	cube = numpy.stack(numpy.meshgrid(levels, levels, levels, indexing='ij'), axis=-1).reshape(216, 3)
+	palette = numpy.zeros((256, 3), dtype=numpy.uint8)
+	palette[:216] = cube
+	if extraColors:
+		palette[216:216 + len(extraColors)] = extraColors
+	return palette
+
+# The contribution of each channel value to its colour's index in the colour cube
+_cubeIndex = [ ((numpy.arange(256) + 25) // 51 * weight).astype(numpy.uint8) for weight in (36, 6, 1) ]
+
+def quantize(image: numpy.ndarray, extraColors: list[tuple[int, int, int]] = []) -> numpy.ndarray:
+	"""Return the index in `gifPalette(extraColors)` of the colour of each pixel."""
+
+	indices = _cubeIndex[0][image[..., 0]] + _cubeIndex[1][image[..., 1]] + _cubeIndex[2][image[..., 2]]
+	if extraColors:
+		keys = (image[..., 0].astype(numpy.int32) << 16) | (image[..., 1].astype(numpy.int32) << 8) | image[..., 2]
+		for (i, (r, g, b)) in enumerate(extraColors):
+			indices[keys == (r << 16) | (g << 8) | b] = 216 + i
+	return indices
+
+def _lzwCodes(data: bytes) -> tuple[list[int], list[int]]:
+	"""
+	Return the LZW codes for a string of palette indices (with a minimum code size of 8) and the
+	width in bits of each code.
+
+	The codes start at 9 bits and widen as the table grows, up to 12 bits, and the table is cleared
+	when it is full.
+	"""
+
+	(clear, end) = (256, 257)
+	(codes, widths) = ([ clear ], [ 9 ])
+	table = {}
+	(nextCode, width) = (258, 9)
+	prefix = data[0]
+	for pixel in data[1:]:
+		key = (prefix << 8) | pixel
+		code = table.get(key)
+		if code is not None:
+			prefix = code
+			continue
+		codes.append(prefix)
+		widths.append(width)
+		if nextCode == 4096:
+			codes.append(clear)
+			widths.append(width)
+			table.clear()
+			(nextCode, width) = (258, 9)
+		else:
+			table[key] = nextCode
+			nextCode += 1
+			# The decoder adds each entry one code later, so it reads wider codes from the next one
+			if nextCode > 1 << width:
+				width += 1
+		prefix = pixel
+	codes += [ prefix, end ]
+	widths += [ width, width ]
+	return (codes, widths)
+
+def _lzwData(indices: numpy.ndarray) -> bytes:
+	"""Return the LZW image data (as sub-blocks) for palette indices with a minimum code size of 8."""
+
+	(codes, widths) = _lzwCodes(indices.tobytes())
+
+	# Write the codes least significant bit first, each in its own width
+	codes = numpy.array(codes, dtype=numpy.uint16)
+	widths = numpy.array(widths, dtype=numpy.uint8)
+	bits = (codes[:, None] >> numpy.arange(12, dtype=numpy.uint16)) & 1
+	data = numpy.packbits(bits[numpy.arange(12) < widths[:, None]].astype(numpy.uint8), bitorder='little')
+	numBytes = len(data)
+
+	# Split the data into sub-blocks of up to 255 bytes, each preceded by its length
+	numBlocks = -(-numBytes // 255)
+	lastBlock = numBytes - 255 * (numBlocks - 1)
+	blocks = numpy.zeros((numBlocks, 256), dtype=numpy.uint8)
+	blocks[:, 0] = 255
+	blocks[-1, 0] = lastBlock
+	blocks[:, 1:] = numpy.concatenate((data, numpy.zeros(255 * numBlocks - numBytes, dtype=numpy.uint8))).reshape(-1, 255)
+	return b'\x08' + blocks.ravel()[:256 * numBlocks - (255 - lastBlock)].tobytes() + b'\x00'
+
+class GifWriter:
+	"""
+	Writes RGB frames (uint8 arrays of shape (height, width, 3)) to an animated GIF that loops forever.
+
+	Colours are reduced to the palette from `gifPalette(extraColors)`.  After the first frame, each
+	frame only stores the rectangle that changed since the previous one.
+
+	** Member data **
+
+	* `_file`: the open GIF file
+	* `_previous` (numpy.ndarray | None): the palette indices of the previous frame
+	"""
+
+	def __init__(self, path: str, width: int, height: int, delay: float = .1, extraColors: list[tuple[int, int, int]] = []):
+		"""Start a GIF whose frames are each shown for `delay` seconds."""
+
+		self._extraColors = extraColors
+		self._delay = int(round(delay * 100))
+		self._previous = None
+		self._file = open(path, 'wb')
+		self._file.write(b'GIF89a' + struct.pack('<HHBBB', width, height, 0xf7, 0, 0))
+		self._file.write(gifPalette(extraColors).tobytes())
+		self._file.write(b'\x21\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00')
+
+	def addFrame(self, image: numpy.ndarray) -> None:
+		indices = quantize(image, self._extraColors)
+		(top, left, bottom, right) = (0, 0) + indices.shape
+		if self._previous is not None:
+			changed = indices != self._previous
+			(rows, columns) = (numpy.flatnonzero(changed.any(axis=1)), numpy.flatnonzero(changed.any(axis=0)))
+			if len(rows):
+				(top, bottom, left, right) = (int(rows[0]), int(rows[-1]) + 1, int(columns[0]), int(columns[-1]) + 1)
+			else:
+				(top, left, bottom, right) = (0, 0, 1, 1)
+		self._previous = indices
+
+		# The previous frame is left in place under this one, which only covers the rectangle that changed
+		self._file.write(b'\x21\xf9\x04' + struct.pack('<BHBB', 0x04, self._delay, 0, 0))
+		self._file.write(b'\x2c' + struct.pack('<HHHHB', left, top, right - left, bottom - top, 0))
+		self._file.write(_lzwData(indices[top:bottom, left:right]))
+
+	def close(self) -> None:
+		self._file.write(b'\x3b')
+		self._file.close()
+
+def writeGif(path: str, frames: list[numpy.ndarray], delay: float = .1, extraColors: list[tuple[int, int, int]] = []) -> None:
+	"""Write RGB frames as an animated GIF (see `GifWriter`)."""
+
+	writer = GifWriter(path, frames[0].shape[1], frames[0].shape[0], delay, extraColors)
+	for frame in frames:
+		writer.addFrame(frame)
+	writer.close()
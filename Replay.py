@@ -0,0 +1,207 @@
+"""
+Evaluate how well agents track the ghosts by replaying recorded games.
+
+Each game in a trace file (see Trace.py) is replayed to an agent: every turn the agent is given the
+recorded observations with `findMove`, Pacman makes the recorded move (whatever move the agent
+chose), the agent is told which ghosts were caught, exactly as in the original game, and the ghosts
+"move" to their recorded states.  The ghosts are never simulated, so the same games can be used to
+compare the inference of any number of agents.
+
+After Pacman moves on each turn, the agent's `ghostPositionArray` and `ghostTypeDistribution`
+for every ghost that has not been caught are scored against the true state of the ghost:
+
+* log likelihood: the mean natural log of the probability given to the true location (or type)
+* accuracy: how often the most likely location (or type) is the true one
+* position error: the mean expected Manhattan distance between the predicted and true location
+
+The games are spread over a pool of worker processes and the CPU time spent by the agent is measured
+so that accuracy can be compared per CPU second.
+
+Example, comparing the inference of two agents on recorded games:
+
+	python Tournament.py MyAgent -n 100 --seed 1 --trace games.npz
+	python Replay.py games.npz MyAgent ExpectimaxAgent -t 0.02
+"""
+
+from Engine import *
+from Trace import GameTrace, loadTraces, caughtByPacmanMove, caughtByGhostMove
+
+import argparse, importlib, json, math, sys, time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+
+# Probability used in place of zero when taking logs, so one bad prediction does not dominate
+minProbability = 1e-6
+
+@dataclass
+class ReplayResult:
+	"""
+	The scores of an agent's predictions in one replayed game.
+
+	The log likelihoods, hits and errors are totals over the `predictions` made in the game.
+	"""
+
+	agent: str
+	numGhosts: int
+	turns: int
+	predictions: int
+	positionLogLikelihood: float
+	positionHits: int
+	positionError: float
+	typeLogLikelihood: float
+	typeHits: int
+	cpuTime: float
+
+def replayGame(agent: str, trace: GameTrace, timeLimit: float | None = None, seed: int | None = None) -> ReplayResult:
+	"""
+	Replay a recorded game to a new instance of the `MyAgent` class from an agent module.
+
+	** Parameters **
+
+	* `agent` (str): the name of the agent module
+	* `trace` (GameTrace): the game to replay
+	* `timeLimit` (float): the time limit for the agent's moves, or None to use the game's time limit
+	* `seed` (int): if given, the agent's random number generators are seeded with it
+	"""
+
+	agentModule = importlib.import_module(agent)
+	if timeLimit is None:
+		timeLimit = trace.timeLimit
+	if seed is not None:
+		seedAgentRandomness(seed)
+
+	board = Board()
+	distances = _manhattanDistances(board)
+	pacman = Pacman(board)
+	cpuStart = time.process_time()
+	pacmanAgent = agentModule.MyAgent(board, pacman, trace.numGhosts, timeLimit)
+
+	result = ReplayResult(agent, trace.numGhosts, trace.numTurns(), 0, 0., 0, 0., 0., 0, 0.)
+	for (turn, turnRow) in enumerate(trace.turns):
+		location = pacman.getState().location
+		if (location.x, location.y) != (turnRow['pacmanX'], turnRow['pacmanY']):
+			raise ValueError(f'Pacman is at {location} on turn {turn + 1} of the replay but was at ({turnRow["pacmanX"]}, {turnRow["pacmanY"]}) in the game')
+		ghostRows = trace.ghosts[turn]
+
+		pacmanAgent.pauseThinking()
+		pacmanAgent.startTurn()
+		pacmanAgent.findMove([ int(observation) for observation in ghostRows['observation'] ])
+		pacmanAgent.endTurn()
+		pacman.move(turnRow['move'].decode())
+
+		for ghostId in range(trace.numGhosts):
+			if ghostRows[ghostId]['alive']:
+				_scorePredictions(result, pacmanAgent, board, distances, trace.ghostState(turn, ghostId), ghostId)
+
+		_tellCaught(pacmanAgent, ghostRows['caughtBy'], caughtByPacmanMove)
+		pacmanAgent.ghostsHaveMoved()
+		_tellCaught(pacmanAgent, ghostRows['caughtBy'], caughtByGhostMove)
+		pacmanAgent.resumeThinking()
+
+	pacmanAgent.stopThinking()
+	result.cpuTime = time.process_time() - cpuStart
+	return result
+
+def _tellCaught(pacmanAgent: BaseAgent, caughtBy, how: int) -> None:
+	"""Tell the agent about each ghost, in the same way as `GhostbustersEngine._checkCaught`."""
+
+	for (ghostId, caught) in enumerate(caughtBy):
+		if caught == how:
+			pacmanAgent.ghostCaught(ghostId)
+		else:
+			pacmanAgent.ghostNotCaught(ghostId)
+
+def _manhattanDistances(board: Board) -> numpy.ndarray:
+	"""Return the Manhattan distances between every pair of the board's cells, indexed by cell id."""
+
+	cells = numpy.array([ (location.x, location.y) for location in board.validLocations() ])
+	return numpy.abs(cells[:, None, :] - cells[None, :, :]).sum(axis=2)
+
+def _scorePredictions(result: ReplayResult, pacmanAgent: BaseAgent, board: Board, distances: numpy.ndarray, ghost: GhostState, ghostId: int) -> None:
+	"""Add the scores of the agent's predictions about a ghost to the result (`distances` are from `_manhattanDistances`)."""
+
+	positions = pacmanAgent.ghostPositionArray(ghostId)
+	types = pacmanAgent.ghostTypeDistribution(ghostId)
+	cellId = board.cellId(ghost.location)
+
+	result.predictions += 1
+	result.positionLogLikelihood += math.log(max(float(positions[cellId]), minProbability))
+	result.positionHits += int(numpy.argmax(positions)) == cellId
+	result.positionError += float(positions @ distances[cellId])
+	result.typeLogLikelihood += math.log(max(types.get(ghost.ghostType, 0.), minProbability))
+	result.typeHits += max(types, key=types.get) == ghost.ghostType
+
+def replayTraces(agents: list[str], traces: list[GameTrace], timeLimit: float | None = None, workers: int | None = None, seed: int | None = None) -> list[ReplayResult]:
+	"""Replay every game to every agent, in parallel unless `workers` is 1."""
+
+	jobs = [ (agent, trace, timeLimit, seed) for agent in agents for trace in traces ]
+	if workers == 1:
+		return [ replayGame(*job) for job in jobs ]
+	with ProcessPoolExecutor(max_workers=workers) as pool:
+		return list(pool.map(replayGame, *zip(*jobs)))
+
+def summarize(results: list[ReplayResult]) -> list[dict]:
+	"""Return the mean scores of each agent's predictions."""
+
+	groups = {}
+	for result in results:
+		groups.setdefault(result.agent, []).append(result)
+
+	summaries = []
+	for (agent, games) in groups.items():
+		predictions = sum(game.predictions for game in games)
+		cpuTime = sum(game.cpuTime for game in games)
+		mean = lambda name: sum(getattr(game, name) for game in games) / predictions if predictions else None
+		summaries.append({
+			'agent': agent,
+			'games': len(games),
+			'turns': sum(game.turns for game in games),
+			'predictions': predictions,
+			'positionLogLikelihood': mean('positionLogLikelihood'),
+			'positionAccuracy': mean('positionHits'),
+			'positionError': mean('positionError'),
+			'typeLogLikelihood': mean('typeLogLikelihood'),
+			'typeAccuracy': mean('typeHits'),
+			'cpuTime': cpuTime,
+			'predictionsPerCpuSecond': predictions / cpuTime if cpuTime > 0 else None,
+		})
+	return summaries
+
+def printSummary(summaries: list[dict]) -> None:
+	"""Print the summaries as a table."""
+
+	print(f'{"Agent":20} {"Games":>6} {"Predictions":>11} {"Pos LL":>8} {"Pos acc":>8} {"Pos err":>8} {"Type LL":>8} {"Type acc":>8} {"CPU s":>8} {"Pred/CPU s":>10}')
+	for s in summaries:
+		if not s['predictions']:
+			print(f'{s["agent"]:20} {s["games"]:6} {0:11}')
+			continue
+		print(f'{s["agent"]:20} {s["games"]:6} {s["predictions"]:11} {s["positionLogLikelihood"]:8.3f} {s["positionAccuracy"]*100:7.1f}% {s["positionError"]:8.2f} '
+			f'{s["typeLogLikelihood"]:8.3f} {s["typeAccuracy"]*100:7.1f}% {s["cpuTime"]:8.1f} {s["predictionsPerCpuSecond"]:10.1f}')
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Score the predictions of agents on recorded games of Ghostbusters')
+	parser.add_argument('trace', type=str, help="trace file (.npz) recorded with --trace")
+	parser.add_argument('agents', type=str, nargs='+', help="agent modules to evaluate")
+	parser.add_argument('-t', type=float, default=None, help="time limit for each move (default: the time limit of each recorded game)")
+	parser.add_argument('-n', type=int, default=None, help="only replay the first n games")
+	parser.add_argument('-w', type=int, default=None, help="number of worker processes (default: one per core)")
+	parser.add_argument('--seed', type=int, help="seed for the agents' random numbers")
+	parser.add_argument('--json', type=str, help="file to write the summary and individual game results to")
+	args = parser.parse_args()
+
+	agents = [ agent.split('.')[0] for agent in args.agents ]
+	for agent in agents:
+		try:
+			importlib.import_module(agent)
+		except ModuleNotFoundError:
+			print(f'Invalid agent module name {agent}')
+			sys.exit()
+
+	traces = loadTraces(args.trace)[:args.n]
+	results = replayTraces(agents, traces, args.t, args.w, args.seed)
+	summaries = summarize(results)
+	printSummary(summaries)
+
+	if args.json:
+		with open(args.json, 'w') as f:
+			json.dump({ 'summary': summaries, 'games': [ asdict(result) for result in results ] }, f, indent=1)
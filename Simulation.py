@@ -0,0 +1,194 @@
+"""
+Lightweight game states for agents that simulate many moves.
+
+A `SimState` holds only what changes during a game: Pacman's cell, the state of each ghost, the score
+and the turn.  Locations and ghost states are stored as small integers that index tables shared by
+every `SimState` on the same board (see `SimulationTables`), so cloning a state copies a short list and
+a step is a handful of list and dictionary lookups.  The ghosts move with exactly the same rules as in
+the game because the tables are filled in from `cachedGhostMoves`.
+
+Typical use in a search:
+
+	state = SimState.fromGame(board, pacmanLocation, ghostStates)
+	for move in state.legalMoves():
+		state.step(move)
+		... evaluate state ...
+		state.undo()
+"""
+
+from Ghost import *
+
+import random
+import weakref
+
+deadGhost = GhostState(alive=False, ghostType='', location=Coordinate(0,0), heading='', thinking=False)
+maxTurns = 1000
+
+class SimulationTables:
+	"""
+	Integer encodings of a board and of the ghost rules, shared by all simulation states on that board.
+
+	** Member data **
+
+	* `_board` (weakref.ref): the board that the tables describe (see `getBoard`).  Only a weak
+		reference is kept so that the tables, which are cached for each board, do not keep it alive.
+	* `moves` (list[tuple]): for each cell id, the (direction, new cell id) pairs for the possible moves
+	* `moveTo` (list[dict[str, int]]): for each cell id, a dictionary from direction to the new cell id
+	* `distance` (list[list[int]]): the path distance between every pair of cells
+	* `ghostStates` (list[GhostState]): every ghost state seen so far; a ghost state id indexes this list.
+		Id 0 is a caught ghost.
+	* `ghostCell` (list[int]): the cell id of each ghost state, or -1 for a caught ghost
+	"""
+
+	def __init__(self, board: Board):
+		self._board = weakref.ref(board)
+		cells = board.validLocations()
+		self.moves = [ tuple((direction, board.cellId(newLocation)) for (direction, newLocation) in board.possibleMoves(location).items()) for location in cells ]
+		self.moveTo = [ dict(moves) for moves in self.moves ]
+		self.distance = board.pathDistanceArray().tolist()
+		self.ghostStates = [ deadGhost ]
+		self.ghostCell = [ -1 ]
+		self._ghostStateId = { deadGhost : 0 }
+		self._dependsOnPacman = [ False ]
+		self._transitions = {}
+
+	def getBoard(self) -> Board:
+		"""Return the board that the tables describe (which must still be in use)."""
+		return self._board()
+
+	def ghostStateId(self, state: GhostState) -> int:
+		"""Return the id of a ghost state, giving it a new id if it has not been seen before."""
+
+		stateId = self._ghostStateId.get(state)
+		if stateId is None:
+			if not state.alive:
+				return 0
+			stateId = self._ghostStateId[state] = len(self.ghostStates)
+			self.ghostStates.append(state)
+			board = self.getBoard()
+			self.ghostCell.append(board.cellId(state.location))
+			self._dependsOnPacman.append(ghostMoveDependsOnPacman(state, board))
+		return stateId
+
+	def transitions(self, stateId: int, pacmanCell: int) -> tuple[int, ...]:
+		"""Return the ids of the possible (equally likely) next states of a ghost when Pacman is in a cell."""
+
+		# Most moves do not depend on Pacman, so they are only stored once (with a negative key)
+		if self._dependsOnPacman[stateId]:
+			key = stateId * len(self.moves) + pacmanCell
+		else:
+			key = -1 - stateId
+		result = self._transitions.get(key)
+		if result is None:
+			board = self.getBoard()
+			pacmanLocation = board.validLocations()[pacmanCell]
+			result = self._transitions[key] = tuple(self.ghostStateId(state) for state in cachedGhostMoves(self.ghostStates[stateId], pacmanLocation, board))
+		return result
+
+_tables = weakref.WeakKeyDictionary()
+
+def simulationTables(board: Board) -> SimulationTables:
+	"""Return the simulation tables for a board, creating them the first time."""
+
+	tables = _tables.get(board)
+	if tables is None:
+		tables = _tables[board] = SimulationTables(board)
+	return tables
+
+class SimState:
+	"""
+	A minimal, quickly copied game position.
+
+	** Member data **
+
+	* `pacman` (int): the cell id of Pacman's location
+	* `ghosts` (list[int]): the ghost state id of each ghost (0 once it has been caught)
+	* `score` (int): the score of the game so far
+	* `turn` (int): the number of turns played so far
+
+	`step` plays one turn of the game with the same rules (and in the same order) as `Ghostbusters.play`,
+	and `undo` reverses the most recent step that has not been undone.
+	"""
+
+	__slots__ = ('tables', 'pacman', 'ghosts', 'score', 'turn', '_history')
+
+	def __init__(self, tables: SimulationTables, pacman: int, ghosts: list[int], score: int = 0, turn: int = 0):
+		self.tables = tables
+		self.pacman = pacman
+		self.ghosts = ghosts
+		self.score = score
+		self.turn = turn
+		self._history = []
+
+	@staticmethod
+	def fromGame(board: Board, pacmanLocation: Coordinate, ghostStates: list[GhostState], score: int = 0, turn: int = 0) -> 'SimState':
+		"""Create a simulation state from Pacman's location and the (full) states of the ghosts."""
+
+		tables = simulationTables(board)
+		return SimState(tables, board.cellId(pacmanLocation), [ tables.ghostStateId(state) for state in ghostStates ], score, turn)
+
+	def clone(self) -> 'SimState':
+		"""Return an independent copy of the state (without its undo history)."""
+		return SimState(self.tables, self.pacman, list(self.ghosts), self.score, self.turn)
+
+	def pacmanLocation(self) -> Coordinate:
+		"""Return Pacman's location as a board Coordinate."""
+		return self.tables.getBoard().validLocations()[self.pacman]
+
+	def ghostStates(self) -> list[GhostState]:
+		"""Return the full state of each ghost."""
+		return [ self.tables.ghostStates[ghost] for ghost in self.ghosts ]
+
+	def legalMoves(self) -> tuple[tuple[str, int], ...]:
+		"""Return the (direction, new cell id) pairs for the moves Pacman can make."""
+		return self.tables.moves[self.pacman]
+
+	def numAlive(self) -> int:
+		"""Return the number of ghosts that have not been caught."""
+		return sum(1 for ghost in self.ghosts if ghost != 0)
+
+	def isOver(self) -> bool:
+		"""Return True if all of the ghosts have been caught or the turn limit has been reached."""
+		return self.turn >= maxTurns or not any(self.ghosts)
+
+	def step(self, move: str, rng=random) -> int:
+		"""
+		Play one turn with Pacman making a move and return the change in score.
+
+		** Parameters **
+
+		* `move` (str): one of Pacman's legal moves ('N', 'E', 'S' or 'W')
+		* `rng`: the random number generator used to choose between the ghosts' possible moves
+		"""
+
+		tables = self.tables
+		ghostCell = tables.ghostCell
+		self._history.append((self.pacman, list(self.ghosts), self.score))
+
+		pacman = self.pacman = tables.moveTo[self.pacman][move]
+		ghosts = self.ghosts
+		score = self.score
+		for ghostId, ghost in enumerate(ghosts):
+			if ghost != 0 and ghostCell[ghost] == pacman:
+				ghosts[ghostId] = 0
+				score += 1000
+				
+		# Caught ghosts "move" too so that random numbers are used the same way as in the game
+		for ghostId, ghost in enumerate(ghosts):
+			ghost = ghosts[ghostId] = rng.choice(tables.transitions(ghost, pacman))
+			if ghost != 0:
+				if ghostCell[ghost] == pacman:
+					ghosts[ghostId] = 0
+					score += 1000
+				else:
+					score -= 1
+
+		change = score - self.score
+		self.score = score
+		self.turn += 1
+		return change
+
+	def undo(self) -> None:
+		"""Reverse the most recent step."""
+		(self.pacman, self.ghosts, self.score) = self._history.pop()
+		self.turn -= 1
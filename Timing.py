@@ -0,0 +1,120 @@
+"""
+Measure where the time goes in each turn of a game.
+
+A `PhaseTimer` given to `GhostbustersEngine.setTimer` is told each time the engine finishes a phase
+of a turn with `lap`, which charges the time since the previous lap to that phase.  The phases are:
+
+* `sensor`: measuring the noisy distances
+* `findMove`: the agent choosing its move
+* `pacmanMove`: moving Pacman
+* `catchCheck`: checking for caught ghosts and telling the agent which ghosts were (not) caught
+* `ghostMove`: moving the ghosts
+* `ghostsHaveMoved`: the agent updating its beliefs after the ghosts move
+* `resumeThinking`: the agent resuming any background thinking
+* `score`: updating the score
+* one phase for each kind of observer, named after its class, such as `ConsoleObserver` (printing),
+	`GraphicsObserver` (rendering) and `PauseObserver` (waiting between turns)
+
+Without a timer the engine uses a `NullTimer`, whose methods do nothing.
+
+`summarizePhases` reduces the per-turn timings to percentiles and `writeTimings` saves them as JSON
+or CSV.
+"""
+
+import csv, json, time
+import numpy
+
+class NullTimer:
+	"""A timer that records nothing."""
+
+	def start(self) -> None:
+		pass
+
+	def lap(self, phase: str) -> None:
+		pass
+
+	def endTurn(self) -> None:
+		pass
+
+class PhaseTimer(NullTimer):
+	"""
+	Records the time spent in each phase of each turn.
+
+	** Member data **
+
+	* `_turns` (list[dict[str, float]]): the seconds spent in each phase, for each finished turn
+	* `_current` (dict[str, float]): the seconds spent in each phase so far this turn
+	* `_last` (float): the `time.perf_counter` value at the end of the previous lap
+	"""
+
+	def __init__(self):
+		self._turns = []
+		self._current = {}
+		self._last = time.perf_counter()
+
+	def start(self) -> None:
+		"""Start timing a turn."""
+		self._current = {}
+		self._last = time.perf_counter()
+
+	def lap(self, phase: str) -> None:
+		"""Charge the time since the previous lap to a phase."""
+		now = time.perf_counter()
+		self._current[phase] = self._current.get(phase, 0.) + now - self._last
+		self._last = now
+
+	def endTurn(self) -> None:
+		"""Finish timing a turn."""
+		self._turns.append(self._current)
+		self._current = {}
+
+	def turns(self) -> list[dict[str, float]]:
+		"""Return the seconds spent in each phase of each turn."""
+		return self._turns
+
+def summarizePhases(turns: list[dict[str, float]]) -> dict[str, dict[str, float]]:
+	"""
+	Summarize the time spent in each phase per turn.
+
+	** Return value **
+
+	A dictionary from each phase (in the order they first occur) to its `total`, `mean`, `p50`, `p95`
+	and `max` seconds per turn.  A phase missing from a turn counts as taking no time.
+	"""
+
+	phases = list(dict.fromkeys(phase for turn in turns for phase in turn))
+	summary = {}
+	for phase in phases:
+		times = numpy.array([ turn.get(phase, 0.) for turn in turns ])
+		(p50, p95) = numpy.percentile(times, [50, 95])
+		summary[phase] = { 'total': float(times.sum()), 'mean': float(times.mean()), 'p50': float(p50), 'p95': float(p95), 'max': float(times.max()) }
+	return summary
+
+def printPhaseSummary(summary: dict[str, dict[str, float]]) -> None:
+	"""Print a phase summary as a table, in milliseconds."""
+
+	total = sum(stats['total'] for stats in summary.values())
+	print(f'{"Phase":20} {"p50 ms":>9} {"p95 ms":>9} {"max ms":>9} {"total s":>9} {"share":>6}')
+	for (phase, stats) in summary.items():
+		share = stats['total'] / total * 100 if total > 0 else 0.
+		print(f'{phase:20} {stats["p50"]*1000:9.3f} {stats["p95"]*1000:9.3f} {stats["max"]*1000:9.3f} {stats["total"]:9.3f} {share:5.1f}%')
+
+def writeTimings(path: str, rows: list[dict], summaries: dict[str, dict]) -> None:
+	"""
+	Write per-turn timings to a file, as CSV if the path ends in `.csv` and otherwise as JSON.
+
+	** Parameters **
+
+	* `rows` (list[dict]): one dictionary per turn with any labels (such as the agent and turn) followed by the phase times
+	* `summaries` (dict[str, dict]): phase summaries (from `summarizePhases`) by name; only written to JSON
+	"""
+
+	if path.endswith('.csv'):
+		columns = list(dict.fromkeys(column for row in rows for column in row))
+		with open(path, 'w', newline='') as f:
+			writer = csv.DictWriter(f, columns, restval=0.)
+			writer.writeheader()
+			writer.writerows(rows)
+	else:
+		with open(path, 'w') as f:
+			json.dump({ 'summary': summaries, 'turns': rows }, f, indent=1)
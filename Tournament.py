@@ -0,0 +1,240 @@
+"""
+Run many games of Ghostbusters without output and summarize how well each agent does.
+
+Games are spread over a pool of worker processes.  For each combination of agent, number of ghosts
+and time limit the summary shows the mean score with a 95% confidence interval, how often and how
+quickly all of the ghosts were caught, and the catch rate for each ghost type.
+
+Every game is seeded, from `--seed` if it is given and otherwise from fresh entropy, so the worker
+processes never share random numbers and each result records the seed its game was played with.
+Game number i uses the same seed for every agent and setting, so it starts with the same ghosts and
+gets the same random numbers (although the games differ once Pacman's moves differ).  With `--seed`
+the tournament can be played again, but a game is only reproduced exactly by agents whose choices do
+not depend on wall-clock time, such as MyAgent.  Agents that search until their time limit (such as
+MCTSAgent and ExpectimaxAgent) can play differently with the same seed.
+
+Example, comparing two agents over 100 games each with 2 and 4 ghosts:
+
+	python Tournament.py MCTSAgent ExpectimaxAgent -n 100 --ghosts 2 4 --time-limits 0.1 --seed 1
+"""
+
+from Engine import *
+from Trace import GameTrace, TraceRecorder, saveTraces
+from Timing import PhaseTimer, summarizePhases, printPhaseSummary, writeTimings
+
+import argparse, importlib, json, math, os, sys
+import numpy.random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, fields
+
+@dataclass
+class GameResult:
+	"""
+	The outcome of a single game.
+
+	* `ghostTypes` (list[str]): the type of each ghost at the start of the game
+	* `catchTurns` (list[int | None]): the turn each ghost was caught on, or None if it was not caught
+	* `seed` (int | None): the seed the game was played with, or None if it was not seeded
+	* `trace` (GameTrace | None): the recording of the game, if it was traced
+	* `budget` (dict): how the agent used its time limit (see `Agent.summarizeBudget`)
+	* `timings` (list[dict[str, float]] | None): the seconds spent in each phase of each turn, if the game was timed
+	"""
+
+	agent: str
+	numGhosts: int
+	timeLimit: float
+	score: int
+	turns: int
+	ghostTypes: list[str] = field(default_factory=list)
+	catchTurns: list[int | None] = field(default_factory=list)
+	seed: int | None = None
+	budget: dict = field(default_factory=dict)
+	trace: GameTrace | None = field(default=None, repr=False, compare=False)
+	timings: list[dict[str, float]] | None = field(default=None, repr=False, compare=False)
+
+	def toDict(self) -> dict:
+		"""Return the result (without its trace or timings) as a dictionary."""
+		return { f.name : getattr(self, f.name) for f in fields(self) if f.name not in ('trace', 'timings') }
+
+class ResultObserver(GameObserver):
+	"""Records the ghost types and the turn on which each ghost is caught."""
+
+	def __init__(self):
+		self.ghostTypes = []
+		self.catchTurns = []
+
+	def gameStarted(self, engine):
+		self.ghostTypes = [ ghost.ghostType for ghost in engine.getGhosts() ]
+		self.catchTurns = [ None ] * len(self.ghostTypes)
+
+	def ghostCaught(self, engine, ghostId, ranIntoPacman):
+		self.catchTurns[ghostId] = engine.getTurn()
+
+def playGame(agent: str, numGhosts: int, timeLimit: float, seed: int | None = None, trace: bool = False, timed: bool = False) -> GameResult:
+	"""
+	Play one game without output with the `MyAgent` class from an agent module.
+
+	If `trace` is True the game is recorded and if `timed` is True the time spent in each phase of each turn is measured.
+	"""
+
+	agentModule = importlib.import_module(agent)
+	engine = GhostbustersEngine(agentModule.MyAgent, numGhosts, timeLimit, seed=seed)
+	results = ResultObserver()
+	engine.addObserver(results)
+	recorder = TraceRecorder(agent) if trace else None
+	if recorder:
+		engine.addObserver(recorder)
+	timer = PhaseTimer() if timed else None
+	if timer:
+		engine.setTimer(timer)
+	score = engine.play()
+	return GameResult(agent, numGhosts, timeLimit, score, engine.getTurn(), results.ghostTypes, results.catchTurns, seed,
+		summarizeBudget(engine.getAgent().budgetReport()), recorder.trace() if recorder else None, timer.turns() if timer else None)
+
+# Two sided 95% critical values of Student's t distribution for 1 to 30 degrees of freedom
+_tCritical = [ 12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228, 2.201, 2.179, 2.160, 2.145, 2.131,
+	2.120, 2.110, 2.101, 2.093, 2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042 ]
+
+def confidenceInterval(values: list[float]) -> tuple[float, float]:
+	"""Return the mean of the values and the half width of its 95% confidence interval."""
+
+	n = len(values)
+	mean = sum(values) / n
+	if n < 2:
+		return (mean, float('inf'))
+	variance = sum((v - mean)**2 for v in values) / (n - 1)
+	t = _tCritical[n - 2] if n - 1 <= len(_tCritical) else 1.96
+	return (mean, t * math.sqrt(variance / n))
+
+def summarize(results: list[GameResult]) -> list[dict]:
+	"""Return summary statistics for each combination of agent, number of ghosts and time limit."""
+
+	groups = {}
+	for result in results:
+		groups.setdefault((result.agent, result.numGhosts, result.timeLimit), []).append(result)
+
+	summaries = []
+	for ((agent, numGhosts, timeLimit), games) in groups.items():
+		(mean, halfWidth) = confidenceInterval([ game.score for game in games ])
+		finished = [ game.turns for game in games if all(turn is not None for turn in game.catchTurns) ]
+		budgetTurns = sum(game.budget['turns'] for game in games)
+
+		appeared = {}
+		caught = {}
+		for game in games:
+			for (ghostType, turn) in zip(game.ghostTypes, game.catchTurns):
+				appeared[ghostType] = appeared.get(ghostType, 0) + 1
+				if turn is not None:
+					caught[ghostType] = caught.get(ghostType, 0) + 1
+
+		summaries.append({
+			'agent': agent,
+			'numGhosts': numGhosts,
+			'timeLimit': timeLimit,
+			'games': len(games),
+			'meanScore': mean,
+			'scoreCI95': halfWidth,
+			'finishedFraction': len(finished) / len(games),
+			'meanTurnsToFinish': sum(finished) / len(finished) if finished else None,
+			'catchRate': { ghostType : caught.get(ghostType, 0) / appeared[ghostType] for ghostType in 'RSCBO' if ghostType in appeared },
+			'meanUtilisation': sum(game.budget['meanUtilisation'] * game.budget['turns'] for game in games if game.budget['turns']) / budgetTurns,
+			'maxUtilisation': max(game.budget['maxUtilisation'] for game in games if game.budget['turns']),
+			'deadlineMissRate': sum(game.budget['deadlineMisses'] for game in games) / budgetTurns,
+			'fallbackRate': sum(game.budget['fallbacks'] for game in games) / budgetTurns,
+		})
+	return summaries
+
+def gameSeeds(seed: int | None, numGames: int) -> list[int]:
+	"""Return an independent seed for each game number, derived from `seed` or (if it is None) from fresh entropy."""
+	return numpy.random.SeedSequence(seed).generate_state(numGames, numpy.uint64).tolist()
+
+def runTournament(agents: list[str], numGames: int, ghostCounts: list[int], timeLimits: list[float], workers: int | None = None, seed: int | None = None,
+		trace: bool = False, timed: bool = False) -> list[GameResult]:
+	"""
+	Play `numGames` games for every combination of agent, number of ghosts and time limit.
+
+	The games with the same number use the same seed in every combination, derived from `seed` if it
+	is given and otherwise from fresh entropy.  If `trace` is True each result includes the trace of
+	its game and if `timed` is True its timings.
+	"""
+
+	seeds = gameSeeds(seed, numGames)
+	jobs = [ (agent, numGhosts, timeLimit, seeds[game], trace, timed) for agent in agents for numGhosts in ghostCounts for timeLimit in timeLimits for game in range(numGames) ]
+	if workers == 1:
+		return [ playGame(*job) for job in jobs ]
+	with ProcessPoolExecutor(max_workers=workers) as pool:
+		return list(pool.map(playGame, *zip(*jobs)))
+
+def summarizeTimings(results: list[GameResult]) -> dict[str, dict]:
+	"""Return a phase summary (see `Timing.summarizePhases`) of the timed games for each combination of agent, number of ghosts and time limit."""
+
+	groups = {}
+	for result in results:
+		if result.timings is not None:
+			groups.setdefault(f'{result.agent} ghosts={result.numGhosts} time={result.timeLimit:g}', []).extend(result.timings)
+	return { name : summarizePhases(turns) for (name, turns) in groups.items() }
+
+def timingRows(results: list[GameResult]) -> list[dict]:
+	"""Return a row for each turn of each timed game, labelled with the game, for `Timing.writeTimings`."""
+
+	return [ { 'agent': result.agent, 'numGhosts': result.numGhosts, 'timeLimit': result.timeLimit, 'game': game, 'turn': turn + 1, **phases }
+		for (game, result) in enumerate(results) if result.timings is not None for (turn, phases) in enumerate(result.timings) ]
+
+def printSummary(summaries: list[dict]) -> None:
+	"""Print the summaries as a table."""
+
+	print(f'{"Agent":20} {"Ghosts":>6} {"Time":>6} {"Games":>6} {"Mean score":>18} {"Finished":>9} {"Turns":>7} {"Used":>6} {"Missed":>7}  Catch rate (RSCBO)')
+	for s in summaries:
+		turns = f'{s["meanTurnsToFinish"]:.1f}' if s['meanTurnsToFinish'] is not None else '-'
+		rates = ' '.join(f'{s["catchRate"][t]*100:3.0f}%' if t in s['catchRate'] else '   -' for t in 'RSCBO')
+		print(f'{s["agent"]:20} {s["numGhosts"]:6} {s["timeLimit"]:6.3g} {s["games"]:6} {s["meanScore"]:9.1f} ± {s["scoreCI95"]:6.1f} {s["finishedFraction"]*100:8.1f}% {turns:>7} '
+			f'{s["meanUtilisation"]*100:5.1f}% {s["deadlineMissRate"]*100:6.2f}%  {rates}')
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Play a tournament of Ghostbusters games')
+	parser.add_argument('agents', type=str, nargs='+', help="agent modules to evaluate")
+	parser.add_argument('-n', type=int, default=10, help="number of games for each agent, ghost count and time limit")
+	parser.add_argument('--ghosts', type=int, nargs='+', default=[4], help="numbers of ghosts")
+	parser.add_argument('--time-limits', type=float, nargs='+', default=[.1], help="time limits for each move")
+	parser.add_argument('-w', type=int, default=None, help="number of worker processes (default: one per core)")
+	parser.add_argument('--json', type=str, help="file to write the summary and individual game results to")
+	parser.add_argument('--seed', type=int, help="seed for the random numbers, so that every agent plays the same games")
+	parser.add_argument('--trace', type=str, help="file (.npz) to record every game to")
+	parser.add_argument('--timings', type=str, help="file (.json or .csv) to write the time spent in each phase of each turn to")
+	parser.add_argument('--profile', type=str, help="profile the games (played one at a time in this process), writing collapsed stacks (or pstats statistics with --profiler cprofile) to this file")
+	parser.add_argument('--profiler', choices=['sampling', 'cprofile'], default='sampling', help="profiler to use with --profile")
+	args = parser.parse_args()
+
+	agents = [ agent.split('.')[0] for agent in args.agents ]
+	for agent in agents:
+		try:
+			importlib.import_module(agent)
+		except ModuleNotFoundError:
+			print(f'Invalid agent module name {agent}')
+			sys.exit()
+
+	play = lambda workers: runTournament(agents, args.n, args.ghosts, args.time_limits, workers, args.seed, args.trace is not None, args.timings is not None)
+	if args.profile:
+		# Worker processes would not be profiled, so play every game here
+		from Profiling import profileCall
+		results = profileCall(lambda: play(1), args.profile, args.profiler)
+		print()
+	else:
+		results = play(args.w)
+	summaries = summarize(results)
+	printSummary(summaries)
+
+	if args.json:
+		with open(args.json, 'w') as f:
+			json.dump({ 'summary': summaries, 'games': [ result.toDict() for result in results ] }, f, indent=1)
+
+	if args.trace:
+		saveTraces(args.trace, [ result.trace for result in results ])
+
+	if args.timings:
+		timingSummaries = summarizeTimings(results)
+		for (name, summary) in timingSummaries.items():
+			print()
+			print(name)
+			printPhaseSummary(summary)
+		writeTimings(args.timings, timingRows(results), timingSummaries)
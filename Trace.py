@@ -0,0 +1,203 @@
+"""
+Record games of Ghostbusters to compact binary trace files.
+
+A `TraceRecorder` is a `GameObserver` that stores every turn of a game in NumPy structured arrays:
+
+* one row per turn in `GameTrace.turns`: Pacman's location when the distances were measured, the
+	move it made, how long the agent took to choose it and the score at the end of the turn
+* one row per ghost per turn in `GameTrace.ghosts` (shape `(turns, ghosts)`): the noisy distance
+	observed, the true state of the ghost when it was observed (ghosts do not move again until after
+	the agent's predictions are requested) and whether it was caught during the turn, either by
+	Pacman's move or by moving into Pacman
+
+`saveTraces` writes any number of traces, for any mix of agents and numbers of ghosts, to a single
+compressed `.npz` file as three columnar tables (`games`, `turns` and `ghosts`, linked by a `game`
+column) and `loadTraces` reads them back.  The tables can also be analysed directly with NumPy:
+
+	tables = numpy.load('games.npz')
+	ghosts = tables['ghosts']
+	print(ghosts['observation'][ghosts['alive']].mean())
+"""
+
+from Engine import *
+
+import numpy
+from dataclasses import dataclass
+
+traceVersion = 1
+
+# Values of the `caughtBy` column
+notCaught = 0
+caughtByPacmanMove = 1
+caughtByGhostMove = 2
+
+turnDtype = numpy.dtype([
+	('turn', numpy.int16),
+	('pacmanX', numpy.int8),
+	('pacmanY', numpy.int8),
+	('move', 'S1'),
+	('thinkTime', numpy.float32),
+	('score', numpy.int32),
+])
+
+ghostDtype = numpy.dtype([
+	('observation', numpy.int16),
+	('alive', numpy.bool_),
+	('x', numpy.int8),
+	('y', numpy.int8),
+	('heading', 'S1'),
+	('thinking', numpy.bool_),
+	('caughtBy', numpy.int8),
+])
+
+@dataclass
+class GameTrace:
+	"""
+	Everything that happened in one game.
+
+	* `agent` (str): the name of the agent module
+	* `ghostTypes` (str): the type of each ghost, one letter per ghost
+	* `seed` (int | None): the seed the game was played with, or None if it was not seeded
+	* `turns` (numpy.ndarray): one `turnDtype` row for each turn
+	* `ghosts` (numpy.ndarray): `ghostDtype` rows with shape (number of turns, number of ghosts)
+	"""
+
+	agent: str
+	numGhosts: int
+	timeLimit: float
+	seed: int | None
+	score: int
+	ghostTypes: str
+	turns: numpy.ndarray
+	ghosts: numpy.ndarray
+
+	def numTurns(self) -> int:
+		return len(self.turns)
+
+	def ghostState(self, turn: int, ghostId: int) -> GhostState:
+		"""Return the true state of a ghost when it was observed on a turn (counting from 0)."""
+
+		row = self.ghosts[turn, ghostId]
+		if not row['alive']:
+			return caughtGhost
+		return GhostState(alive=True, ghostType=self.ghostTypes[ghostId], location=Coordinate(int(row['x']), int(row['y'])),
+			heading=row['heading'].decode(), thinking=bool(row['thinking']))
+
+class TraceRecorder(GameObserver):
+	"""
+	Records a game as a `GameTrace`.
+
+	** Member data **
+
+	* `_agent` (str): the name to record for the agent
+	* `_turns` (list[tuple]): the rows recorded for the turns so far
+	* `_ghosts` (list[list[tuple]]): the rows recorded for the ghosts so far
+	* `_trace` (GameTrace | None): the finished trace, once the game is over
+	"""
+
+	def __init__(self, agent: str = ''):
+		"""Create a recorder.  If `agent` is not given the module of the agent's class is recorded."""
+		self._agent = agent
+		self._turns = []
+		self._ghosts = []
+		self._ghostTypes = ''
+		self._trace = None
+
+	def gameStarted(self, engine: GhostbustersEngine) -> None:
+		if not self._agent:
+			self._agent = type(engine.getAgent()).__module__
+		self._ghostTypes = ''.join(ghost.ghostType for ghost in engine.getGhosts())
+		self._turns = []
+		self._ghosts = []
+		self._trace = None
+
+	def observationsMade(self, engine: GhostbustersEngine, observations: list[int]) -> None:
+		self._location = engine.getPacman().getState().location
+		self._turnGhosts = [ [ observation, ghost.alive, ghost.location.x, ghost.location.y, ghost.heading, ghost.thinking, notCaught ]
+			for (observation, ghost) in zip(observations, engine.getGhosts()) ]
+
+	def pacmanMoved(self, engine: GhostbustersEngine, action: str) -> None:
+		# The agent's own measurement of findMove, which excludes the time taken by other observers
+		self._thinkTime = engine.getAgent().budgetReport()[-1].thinkTime
+		self._move = action
+
+	def ghostCaught(self, engine: GhostbustersEngine, ghostId: int, ranIntoPacman: bool) -> None:
+		self._turnGhosts[ghostId][-1] = caughtByGhostMove if ranIntoPacman else caughtByPacmanMove
+
+	def turnEnded(self, engine: GhostbustersEngine) -> None:
+		self._turns.append((engine.getTurn(), self._location.x, self._location.y, self._move, self._thinkTime, engine.getScore()))
+		self._ghosts.append([ tuple(row) for row in self._turnGhosts ])
+
+	def gameEnded(self, engine: GhostbustersEngine) -> None:
+		turns = numpy.array(self._turns, dtype=turnDtype)
+		ghosts = numpy.array(self._ghosts, dtype=ghostDtype).reshape(len(self._turns), engine.getNumGhosts())
+		self._trace = GameTrace(self._agent, engine.getNumGhosts(), engine.getTimeLimit(), engine.getSeed(), engine.getScore(), self._ghostTypes, turns, ghosts)
+
+	def trace(self) -> GameTrace | None:
+		"""Return the trace of the game, or None if the game has not finished."""
+		return self._trace
+
+def gameDtype(traces: list[GameTrace]) -> numpy.dtype:
+	"""Return the dtype of the `games` table, with its text columns wide enough for the traces' agent names and ghost types."""
+
+	return numpy.dtype([
+		('agent', f'U{max([ 1 ] + [ len(trace.agent) for trace in traces ])}'),
+		('numGhosts', numpy.int16),
+		('timeLimit', numpy.float64),
+		('seeded', numpy.bool_),
+		('seed', numpy.uint64),
+		('score', numpy.int32),
+		('numTurns', numpy.int16),
+		('ghostTypes', f'U{max([ 1 ] + [ len(trace.ghostTypes) for trace in traces ])}'),
+	])
+
+def saveTraces(path: str, traces: list[GameTrace]) -> None:
+	"""Write traces to a compressed `.npz` file with `games`, `turns` and `ghosts` tables."""
+
+	games = numpy.array([ (trace.agent, trace.numGhosts, trace.timeLimit, trace.seed is not None, trace.seed or 0, trace.score, trace.numTurns(), trace.ghostTypes)
+		for trace in traces ], dtype=gameDtype(traces))
+
+	turns = numpy.empty(sum(trace.numTurns() for trace in traces), dtype=[('game', numpy.int32)] + turnDtype.descr)
+	ghosts = numpy.empty(sum(trace.ghosts.size for trace in traces), dtype=[('game', numpy.int32), ('turn', numpy.int16), ('ghost', numpy.int8)] + ghostDtype.descr)
+	(turnRow, ghostRow) = (0, 0)
+	for (gameId, trace) in enumerate(traces):
+		rows = turns[turnRow : turnRow + trace.numTurns()]
+		rows['game'] = gameId
+		for name in turnDtype.names:
+			rows[name] = trace.turns[name]
+		turnRow += len(rows)
+
+		rows = ghosts[ghostRow : ghostRow + trace.ghosts.size]
+		rows['game'] = gameId
+		rows['turn'] = numpy.repeat(trace.turns['turn'], trace.numGhosts)
+		rows['ghost'] = numpy.tile(numpy.arange(trace.numGhosts), trace.numTurns())
+		for name in ghostDtype.names:
+			rows[name] = trace.ghosts[name].ravel()
+		ghostRow += len(rows)
+
+	numpy.savez_compressed(path, version=traceVersion, games=games, turns=turns, ghosts=ghosts)
+
+def loadTraces(path: str) -> list[GameTrace]:
+	"""Read the traces written by `saveTraces`."""
+
+	with numpy.load(path) as tables:
+		if int(tables['version']) != traceVersion:
+			raise ValueError(f'{path} has trace version {int(tables["version"])}, expected {traceVersion}')
+		(games, turns, ghosts) = (tables['games'], tables['turns'], tables['ghosts'])
+
+	traces = []
+	(turnRow, ghostRow) = (0, 0)
+	for game in games:
+		(numTurns, numGhosts) = (int(game['numTurns']), int(game['numGhosts']))
+		gameTurns = numpy.empty(numTurns, dtype=turnDtype)
+		for name in turnDtype.names:
+			gameTurns[name] = turns[name][turnRow : turnRow + numTurns]
+		gameGhosts = numpy.empty((numTurns, numGhosts), dtype=ghostDtype)
+		for name in ghostDtype.names:
+			gameGhosts[name] = ghosts[name][ghostRow : ghostRow + numTurns * numGhosts].reshape(numTurns, numGhosts)
+		turnRow += numTurns
+		ghostRow += numTurns * numGhosts
+
+		seed = int(game['seed']) if game['seeded'] else None
+		traces.append(GameTrace(str(game['agent']), numGhosts, float(game['timeLimit']), seed, int(game['score']), str(game['ghostTypes']), gameTurns, gameGhosts))
+	return traces